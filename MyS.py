@@ -1,25 +1,440 @@
-import random
 import numpy as np
-import matplotlib
-matplotlib.use('Agg')  # Usar backend sin interfaz gráfica
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
 from datetime import datetime, timedelta
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from statistics import NormalDist
+import csv
+import hashlib
+import heapq
+import inspect
+import itertools
+import json
+import math
 import time
 import os
+import pickle
+import tempfile
+import uuid
 
-class Cliente:
-    """Clase que representa un cliente en el sistema"""
-    def __init__(self, id_cliente, tiempo_llegada):
-        self.id = id_cliente
-        self.tiempo_llegada = tiempo_llegada
-        self.tiempo_inicio_atencion = None
-        self.tiempo_fin_atencion = None
-        self.tiempo_espera = 0
-        self.atendido = False
-        self.abandono = False
-        self.box_asignado = None
+# Tipos de evento del motor por eventos
+EVENTO_LLEGADA = 0
+EVENTO_ASIGNACION = 1
+EVENTO_ABANDONO = 2
+
+MOTORES = ('ticks', 'eventos')
+
+# Versión de la lógica de simulación: cambiarla invalida los resultados guardados en caché
+VERSION_MOTOR = 1
+
+# Parámetros del simulador que se pueden barrer (los enteros se redondean en los diseños)
+PARAMETROS_BARRIDO = ('num_boxes', 'prob_ingreso', 'media_atencion', 'desvio_atencion', 'tiempo_max_espera',
+                      'costo_box', 'perdida_cliente', 'hora_cierre')
+PARAMETROS_ENTEROS = ('num_boxes', 'tiempo_max_espera', 'hora_cierre')
+
+# Métricas del reporte que se resumen en las replicaciones
+METRICAS_REPLICACION = ('costo_total', 'tasa_atencion', 'clientes_abandonaron',
+                        'clientes_atendidos', 'clientes_ingresados')
+
+# Estados de un cliente en el registro
+ESTADO_EN_COLA = 0
+ESTADO_EN_ATENCION = 1
+ESTADO_ATENDIDO = 2
+ESTADO_ABANDONO = 3
+
+COLUMNAS_CLIENTES = ('id', 'llegada', 'atencion', 'inicio', 'fin', 'box', 'estado')
+
+# Registro de una traza binaria: segundo de llegada (desde 1970-01-01 00:00, hora local) y duración de la atención
+TIPO_TRAZA = np.dtype([('llegada', '<i8'), ('atencion', '<f8')])
+EPOCA_TRAZA = datetime(1970, 1, 1)
+
+def estado_sin_envolturas(objeto):
+    """Atributos del objeto sin los métodos reemplazados en la instancia (envolturas de PerfilSimulacion)"""
+    return {nombre: valor for nombre, valor in vars(objeto).items()
+            if not (callable(valor) and hasattr(type(objeto), nombre))}
+
+class RegistroClientes:
+    """Almacena los clientes en columnas NumPy preasignadas; cada cliente es un índice entero.
+
+    Sin traza, los índices de los clientes que ya terminaron se reutilizan y la
+    memoria depende de cuántos clientes hay a la vez en el local, no del total.
+    """
+    def __init__(self, guardar_traza=True, capacidad=256, destino=None):
+        self.guardar_traza = guardar_traza
+        self.destino = destino  # TablaEnDisco donde se escribe cada cliente al terminar (opcional)
+        self.cantidad = 0  # Índices usados alguna vez
+        self.indices_libres = []
+        self.id = np.zeros(capacidad, dtype=np.int64)
+        self.llegada = np.zeros(capacidad, dtype=np.int64)
+        self.atencion = np.zeros(capacidad)  # Duración de atención que requiere el cliente
+        self.inicio = np.full(capacidad, -1, dtype=np.int64)
+        self.fin = np.full(capacidad, -1, dtype=np.int64)
+        self.box = np.full(capacidad, -1, dtype=np.int32)
+        self.estado = np.zeros(capacidad, dtype=np.int8)
+    
+    def __len__(self):
+        return self.cantidad - len(self.indices_libres)
+    
+    def __getstate__(self):
+        # Una copia serializada no escribe en el destino del original
+        return dict(estado_sin_envolturas(self), destino=None)
+    
+    def agrandar(self):
+        """Duplica la capacidad de todas las columnas"""
+        for nombre in COLUMNAS_CLIENTES:
+            columna = getattr(self, nombre)
+            nueva = np.full(2 * len(columna), -1 if nombre in ('inicio', 'fin', 'box') else 0, dtype=columna.dtype)
+            nueva[:len(columna)] = columna
+            setattr(self, nombre, nueva)
+    
+    def alta(self, id_cliente, tiempo_llegada, tiempo_atencion):
+        """Registra un cliente que llega y devuelve su índice"""
+        if self.indices_libres:
+            indice = self.indices_libres.pop()
+            self.inicio[indice] = -1
+            self.fin[indice] = -1
+            self.box[indice] = -1
+        else:
+            if self.cantidad == len(self.id):
+                self.agrandar()
+            indice = self.cantidad
+            self.cantidad += 1
+        self.id[indice] = id_cliente
+        self.llegada[indice] = tiempo_llegada
+        self.atencion[indice] = tiempo_atencion
+        self.estado[indice] = ESTADO_EN_COLA
+        return indice
+    
+    def tipos(self):
+        """Devuelve el tipo de dato de cada columna"""
+        return {nombre: getattr(self, nombre).dtype for nombre in COLUMNAS_CLIENTES}
+    
+    def exportar(self, indice):
+        """Escribe la fila del cliente en el destino, si hay uno"""
+        if self.destino is not None:
+            self.destino.agregar(*(getattr(self, nombre)[indice] for nombre in COLUMNAS_CLIENTES))
+    
+    def liberar(self, indice):
+        """Marca que el cliente terminó; sin traza su índice queda disponible"""
+        self.exportar(indice)
+        if not self.guardar_traza:
+            self.indices_libres.append(indice)
+    
+    def columnas(self):
+        """Devuelve las columnas de la traza (vistas sin copia) como diccionario"""
+        return {nombre: getattr(self, nombre)[:self.cantidad] for nombre in COLUMNAS_CLIENTES}
+
+COLUMNAS_SERIE = ('tiempo', 'cola_size', 'boxes_ocupados', 'atendidos', 'abandonos')
+
+def indices_lttb(x, columnas, puntos):
+    """Índices de los puntos que conserva Largest-Triangle-Three-Buckets.
+
+    Divide la serie en `puntos` - 2 cubetas (más el primer y el último punto) y
+    en cada una se queda con el punto que forma el triángulo de mayor área con el
+    punto elegido antes y el promedio de la cubeta siguiente. Con varias columnas
+    el área se suma sobre todas, normalizadas a su rango, y se eligen los mismos
+    índices para todas.
+    """
+    n = len(x)
+    if puntos >= n or puntos < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    ys = np.array([(c - c.min()) / (np.ptp(c) or 1) for c in map(np.asarray, columnas)], dtype=float)
+    bordes = np.linspace(1, n - 1, puntos - 1).astype(np.int64)
+    elegidos = np.empty(puntos, dtype=np.int64)
+    elegidos[0], elegidos[-1] = 0, n - 1
+    a = 0
+    for i in range(puntos - 2):
+        inicio, fin = bordes[i], bordes[i + 1]
+        if i + 2 < len(bordes):
+            x_siguiente = x[fin:bordes[i + 2]].mean()
+            y_siguiente = ys[:, fin:bordes[i + 2]].mean(axis=1)
+        else:
+            x_siguiente, y_siguiente = x[-1], ys[:, -1]
+        y_a = ys[:, a:a + 1]
+        areas = np.abs((x[a] - x_siguiente) * (ys[:, inicio:fin] - y_a)
+                       - (x[a] - x[inicio:fin]) * (y_siguiente[:, None] - y_a)).sum(axis=0)
+        a = inicio + int(np.argmax(areas))
+        elegidos[i + 1] = a
+    return elegidos
+
+class SerieTemporal:
+    """Estado del sistema a lo largo del tiempo en columnas NumPy preasignadas"""
+    def __init__(self, capacidad=256):
+        self.cantidad = 0
+        self.tiempo = np.zeros(capacidad, dtype=np.int64)
+        self.cola_size = np.zeros(capacidad, dtype=np.int32)
+        self.boxes_ocupados = np.zeros(capacidad, dtype=np.int32)
+        self.atendidos = np.zeros(capacidad, dtype=np.int64)
+        self.abandonos = np.zeros(capacidad, dtype=np.int64)
+    
+    def __len__(self):
+        return self.cantidad
+    
+    def __getstate__(self):
+        return estado_sin_envolturas(self)
+    
+    def agrandar(self):
+        """Duplica la capacidad de todas las columnas"""
+        for nombre in COLUMNAS_SERIE:
+            columna = getattr(self, nombre)
+            nueva = np.zeros(2 * len(columna), dtype=columna.dtype)
+            nueva[:len(columna)] = columna
+            setattr(self, nombre, nueva)
+    
+    def agregar(self, tiempo, cola_size, boxes_ocupados, atendidos, abandonos):
+        """Agrega una muestra al final de la serie"""
+        if self.cantidad == len(self.tiempo):
+            self.agrandar()
+        i = self.cantidad
+        self.tiempo[i] = tiempo
+        self.cola_size[i] = cola_size
+        self.boxes_ocupados[i] = boxes_ocupados
+        self.atendidos[i] = atendidos
+        self.abandonos[i] = abandonos
+        self.cantidad += 1
+    
+    def ultima(self):
+        """Devuelve los valores de la última muestra (sin el tiempo), o None si está vacía"""
+        if not self.cantidad:
+            return None
+        i = self.cantidad - 1
+        return (self.cola_size[i], self.boxes_ocupados[i], self.atendidos[i], self.abandonos[i])
+    
+    def columnas(self):
+        """Devuelve las columnas de la serie (vistas sin copia) como diccionario"""
+        return {nombre: getattr(self, nombre)[:self.cantidad] for nombre in COLUMNAS_SERIE}
+    
+    def tipos(self):
+        """Devuelve el tipo de dato de cada columna"""
+        return {nombre: getattr(self, nombre).dtype for nombre in COLUMNAS_SERIE}
+    
+    def reducir(self, puntos):
+        """Devuelve las columnas reducidas a lo sumo a `puntos` muestras con LTTB (conserva la forma)"""
+        columnas = self.columnas()
+        indices = indices_lttb(columnas['tiempo'], [columnas[nombre] for nombre in COLUMNAS_SERIE[1:]], puntos)
+        return {nombre: columna[indices] for nombre, columna in columnas.items()}
+
+class TablaEnDisco:
+    """Escribe una tabla columnar en disco por fragmentos, a medida que llegan las filas.
+
+    Las filas se acumulan en columnas NumPy preasignadas; al llenarse se guardan
+    como un fragmento: un directorio con un .npy por columna. Cada fragmento se
+    escribe aparte y se renombra al terminar, así los lectores nunca ven uno a
+    medias y varios procesos pueden escribir la misma tabla (cada escritor usa
+    su propio prefijo de nombres). Las columnas constantes (por ejemplo la
+    réplica) toman el valor actual del diccionario `constantes` en cada fila.
+    """
+    def __init__(self, directorio, tipos, constantes=None, tamano_fragmento=65536):
+        self.directorio = directorio
+        self.constantes = constantes if constantes is not None else {}
+        self.nombres = list(tipos)
+        self.tipos = dict(tipos, **{nombre: np.int64 for nombre in self.constantes})
+        self.tamano_fragmento = tamano_fragmento
+        self.prefijo = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.fragmentos = 0
+        self.cantidad = 0
+        self.columnas = {nombre: np.zeros(tamano_fragmento, dtype=tipo) for nombre, tipo in self.tipos.items()}
+        os.makedirs(directorio, exist_ok=True)
+    
+    def agregar(self, *valores):
+        """Agrega una fila (valores en el orden de las columnas, sin las constantes)"""
+        i = self.cantidad
+        for nombre, valor in zip(self.nombres, valores):
+            self.columnas[nombre][i] = valor
+        for nombre, valor in self.constantes.items():
+            self.columnas[nombre][i] = valor
+        self.cantidad += 1
+        if self.cantidad == self.tamano_fragmento:
+            self.vaciar()
+    
+    def agregar_columnas(self, **columnas):
+        """Agrega muchas filas de una vez a partir de arreglos del mismo largo"""
+        n = len(next(iter(columnas.values())))
+        hecho = 0
+        while hecho < n:
+            k = min(n - hecho, self.tamano_fragmento - self.cantidad)
+            for nombre in self.nombres:
+                self.columnas[nombre][self.cantidad:self.cantidad + k] = columnas[nombre][hecho:hecho + k]
+            for nombre, valor in self.constantes.items():
+                self.columnas[nombre][self.cantidad:self.cantidad + k] = valor
+            self.cantidad += k
+            hecho += k
+            if self.cantidad == self.tamano_fragmento:
+                self.vaciar()
+    
+    def vaciar(self):
+        """Guarda las filas acumuladas como un fragmento nuevo"""
+        if not self.cantidad:
+            return
+        nombre = f'{self.prefijo}-{self.fragmentos:06d}'
+        temporal = os.path.join(self.directorio, f'.{nombre}.tmp')
+        os.makedirs(temporal)
+        for columna, valores in self.columnas.items():
+            np.save(os.path.join(temporal, f'{columna}.npy'), valores[:self.cantidad])
+        os.rename(temporal, os.path.join(self.directorio, nombre))
+        self.fragmentos += 1
+        self.cantidad = 0
+
+class AlmacenResultados:
+    """Directorio de resultados con una TablaEnDisco por tipo de dato.
+
+    Tablas que escribe el simulador: 'clientes' (una fila por cliente al
+    terminar), 'serie' (la serie temporal) y 'replicas' (el reporte de cada
+    replicación, en ejecutar_replicaciones). Se leen con leer_fragmentos y
+    leer_tabla. Hay que cerrarlo (o usarlo con `with`) para guardar lo pendiente.
+    """
+    def __init__(self, directorio, tamano_fragmento=65536, **constantes):
+        self.directorio = directorio
+        self.tamano_fragmento = tamano_fragmento
+        self.constantes = constantes  # Columnas agregadas a todas las tablas, ej. replica=0
+        self.tablas = {}
+    
+    def tabla(self, nombre, tipos):
+        """Devuelve el escritor de la tabla (lo crea la primera vez)"""
+        if nombre not in self.tablas:
+            self.tablas[nombre] = TablaEnDisco(os.path.join(self.directorio, nombre), tipos,
+                                               self.constantes, self.tamano_fragmento)
+        return self.tablas[nombre]
+    
+    def cerrar(self):
+        """Guarda las filas pendientes de todas las tablas"""
+        for tabla in self.tablas.values():
+            tabla.vaciar()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+def leer_fragmentos(directorio, tabla, columnas=None):
+    """Recorre los fragmentos de una tabla como diccionarios de columnas mapeadas en memoria"""
+    carpeta = os.path.join(directorio, tabla)
+    if not os.path.isdir(carpeta):
+        return
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre.startswith('.'):
+            continue  # Fragmento que todavía se está escribiendo
+        fragmento = os.path.join(carpeta, nombre)
+        nombres = columnas or [archivo[:-4] for archivo in sorted(os.listdir(fragmento))]
+        yield {columna: np.load(os.path.join(fragmento, f'{columna}.npy'), mmap_mode='r') for columna in nombres}
+
+def leer_tabla(directorio, tabla, columnas=None):
+    """Carga las columnas pedidas de una tabla completa (para tablas grandes conviene leer_fragmentos)"""
+    partes = {}
+    for fragmento in leer_fragmentos(directorio, tabla, columnas):
+        for columna, valores in fragmento.items():
+            partes.setdefault(columna, []).append(valores)
+    return {columna: np.concatenate(valores) for columna, valores in partes.items()}
+
+def descripcion_semilla(semilla):
+    """Representación estable de una semilla para la clave de caché (None si es aleatoria)"""
+    if isinstance(semilla, np.random.SeedSequence):
+        return [semilla.entropy, list(semilla.spawn_key), semilla.pool_size]
+    if isinstance(semilla, (int, np.integer)):
+        return int(semilla)
+    return None
+
+# Bytes escritos en cada caché desde su último recorrido, por (proceso, directorio). Vive en el
+# módulo porque cada tarea del pool recibe una copia nueva de la CacheResultados
+ESCRITOS_SIN_ESCANEAR = {}
+
+class CacheResultados:
+    """Caché en disco de resultados de simulación, direccionada por contenido.
+
+    La clave es el hash de los parámetros del simulador, la semilla, el motor y
+    VERSION_MOTOR. Cada resultado es un pickle que se escribe en un temporal y se
+    renombra, así los procesos del pool pueden leer y escribir a la vez sin ver
+    archivos a medias. Cada lectura actualiza la fecha del archivo y, si el total
+    supera tamano_maximo bytes, se borran los usados hace más tiempo (LRU).
+
+    Cada tarea del pool recibe su propia copia de la caché, así que el tamaño
+    total se mide recorriendo el directorio cada vez que un proceso escribió
+    fraccion_escaneo * tamano_maximo bytes desde su último recorrido. Esa cuenta
+    se lleva por proceso en ESCRITOS_SIN_ESCANEAR (no en la copia), así que el
+    límite se puede pasar como mucho en esa fracción por proceso.
+    """
+    def __init__(self, directorio='.cache_simulacion', tamano_maximo=256 * 2**20, fraccion_escaneo=0.02):
+        self.directorio = directorio
+        self.tamano_maximo = tamano_maximo
+        self.fraccion_escaneo = fraccion_escaneo
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(directorio, exist_ok=True)
+        self.recortar()
+    
+    def clave(self, parametros, semilla, motor):
+        """Devuelve la clave del resultado, o None si la semilla es aleatoria (no se puede reutilizar)"""
+        semilla = descripcion_semilla(semilla)
+        if semilla is None:
+            return None
+        contenido = json.dumps({'version': VERSION_MOTOR, 'parametros': parametros, 'semilla': semilla,
+                                'motor': motor}, sort_keys=True)
+        return hashlib.sha256(contenido.encode()).hexdigest()
+    
+    def ruta(self, clave):
+        return os.path.join(self.directorio, clave[:2], f'{clave}.pkl')
+    
+    def obtener(self, clave):
+        """Devuelve el resultado guardado con esa clave, o None"""
+        ruta = self.ruta(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                resultado = pickle.load(archivo)
+            os.utime(ruta)  # Marcar como usado recientemente
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        return resultado
+    
+    def guardar(self, clave, resultado):
+        """Guarda el resultado de forma atómica y recorta la caché si se pasó del tamaño"""
+        ruta = self.ruta(clave)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=os.path.dirname(ruta), suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as archivo:
+            pickle.dump(resultado, archivo, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta)
+        cuenta = (os.getpid(), os.path.abspath(self.directorio))
+        ESCRITOS_SIN_ESCANEAR[cuenta] = ESCRITOS_SIN_ESCANEAR.get(cuenta, 0) + os.path.getsize(ruta)
+        if ESCRITOS_SIN_ESCANEAR[cuenta] >= self.fraccion_escaneo * self.tamano_maximo:
+            self.recortar()
+    
+    def archivos(self):
+        """Devuelve (fecha de uso, ruta, tamaño) de cada resultado guardado"""
+        archivos = []
+        for carpeta in os.scandir(self.directorio):
+            if not carpeta.is_dir():
+                continue
+            for entrada in os.scandir(carpeta.path):
+                if entrada.name.endswith('.pkl'):
+                    try:
+                        estado = entrada.stat()
+                    except FileNotFoundError:  # Lo borró otro proceso
+                        continue
+                    archivos.append((estado.st_mtime, entrada.path, estado.st_size))
+        return archivos
+    
+    def tamano(self):
+        """Bytes ocupados en disco por todos los resultados guardados (de todos los procesos)"""
+        return sum(tamano for _, _, tamano in self.archivos())
+    
+    def recortar(self):
+        """Si el directorio supera el tamaño máximo, borra los resultados usados hace más tiempo hasta el 90%"""
+        archivos = sorted(self.archivos())
+        ESCRITOS_SIN_ESCANEAR[os.getpid(), os.path.abspath(self.directorio)] = 0
+        total = sum(tamano for _, _, tamano in archivos)
+        if total <= self.tamano_maximo:
+            return
+        for _, ruta, tamano in archivos:
+            if total <= 0.9 * self.tamano_maximo:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
 
 class Box:
     """Clase que representa un box de atención"""
@@ -31,131 +446,647 @@ class Box:
         self.tiempo_total_atencion = 0
         self.clientes_atendidos = 0
 
+class ColaEspera:
+    """Cola FIFO con el vencimiento de espera de cada cliente.
+
+    Con un tiempo máximo de espera constante los vencimientos quedan ordenados
+    igual que las llegadas, así que los abandonos siempre salen por el frente.
+    """
+    def __init__(self):
+        self.clientes = deque()
+        self.vencimientos = deque()
+    
+    def __len__(self):
+        return len(self.clientes)
+    
+    def __bool__(self):
+        return bool(self.clientes)
+    
+    def __iter__(self):
+        return iter(self.clientes)
+    
+    def append(self, cliente, vencimiento):
+        self.clientes.append(cliente)
+        self.vencimientos.append(vencimiento)
+    
+    def popleft(self):
+        self.vencimientos.popleft()
+        return self.clientes.popleft()
+    
+    def extraer_vencidos(self, tiempo):
+        """Quita del frente y devuelve los clientes cuyo vencimiento ya se cumplió"""
+        vencidos = []
+        while self.vencimientos and self.vencimientos[0] <= tiempo:
+            self.vencimientos.popleft()
+            vencidos.append(self.clientes.popleft())
+        return vencidos
+
+class SketchCuantiles:
+    """Sketch de cuantiles combinable con error relativo acotado (cubetas logarítmicas, estilo DDSketch)"""
+    
+    def __init__(self, precision_relativa=0.01):
+        self.precision_relativa = precision_relativa
+        self.gamma = (1 + precision_relativa) / (1 - precision_relativa)
+        self.log_gamma = math.log(self.gamma)
+        self.cubetas = {}
+        self.ceros = 0  # Valores nulos (por ejemplo, clientes atendidos sin esperar)
+        self.n = 0
+    
+    def agregar(self, valor):
+        self.n += 1
+        if valor <= 0:
+            self.ceros += 1
+        else:
+            indice = math.ceil(math.log(valor) / self.log_gamma)
+            self.cubetas[indice] = self.cubetas.get(indice, 0) + 1
+    
+    def combinar(self, otro):
+        """Suma los conteos de otro sketch con la misma precisión"""
+        if otro.gamma != self.gamma:
+            raise ValueError("Solo se pueden combinar sketches con la misma precisión relativa")
+        self.n += otro.n
+        self.ceros += otro.ceros
+        for indice, cantidad in otro.cubetas.items():
+            self.cubetas[indice] = self.cubetas.get(indice, 0) + cantidad
+        return self
+    
+    def cuantil(self, q):
+        """Devuelve el cuantil q (entre 0 y 1) con error relativo menor a la precisión"""
+        if self.n == 0:
+            return float('nan')
+        rango = q * (self.n - 1)
+        acumulado = self.ceros
+        if rango < acumulado:
+            return 0.0
+        for indice in sorted(self.cubetas):
+            acumulado += self.cubetas[indice]
+            if acumulado > rango:
+                return 2 * self.gamma ** indice / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.cubetas) / (self.gamma + 1)
+
+class EstadisticaEnLinea:
+    """Estadísticas en memoria constante: media y varianza (Welford), mínimo, máximo y cuantiles.
+
+    Dos acumuladores se pueden combinar, por ejemplo los de distintas
+    replicaciones o procesos trabajadores.
+    """
+    def __init__(self, precision_relativa=0.01):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.minimo = float('inf')
+        self.maximo = float('-inf')
+        self.sketch = SketchCuantiles(precision_relativa)
+    
+    def agregar(self, valor):
+        self.n += 1
+        delta = valor - self.media
+        self.media += delta / self.n
+        self.m2 += delta * (valor - self.media)
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+        self.sketch.agregar(valor)
+    
+    def combinar(self, otra):
+        """Incorpora las observaciones de otro acumulador (fórmula de Chan et al.)"""
+        if otra.n:
+            n = self.n + otra.n
+            delta = otra.media - self.media
+            self.media += delta * otra.n / n
+            self.m2 += otra.m2 + delta**2 * self.n * otra.n / n
+            self.n = n
+            self.minimo = min(self.minimo, otra.minimo)
+            self.maximo = max(self.maximo, otra.maximo)
+            self.sketch.combinar(otra.sketch)
+        return self
+    
+    def varianza(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+    
+    def cuantil(self, q):
+        # El sketch es aproximado: acotar el resultado a los extremos exactos
+        return min(max(self.sketch.cuantil(q), self.minimo), self.maximo) if self.n else float('nan')
+    
+    def resumen(self):
+        """Devuelve las estadísticas como diccionario (valores en segundos)"""
+        vacio = float('nan')
+        return {
+            'n': self.n,
+            'media': self.media if self.n else vacio,
+            'desvio': math.sqrt(self.varianza()) if self.n > 1 else vacio,
+            'minimo': self.minimo if self.n else vacio,
+            'maximo': self.maximo if self.n else vacio,
+            'p50': self.cuantil(0.5),
+            'p90': self.cuantil(0.9),
+            'p99': self.cuantil(0.99),
+        }
+
+class FlujoAleatorio:
+    """Flujo de variables aleatorias pre-generadas por bloques con un np.random.Generator propio"""
+    
+    def __init__(self, prob_ingreso, media_atencion, desvio_atencion, semilla=None, tamano_bloque=1024,
+                 antitetico=False):
+        # Semillas independientes para llegadas y atenciones (reproducible en corridas paralelas).
+        # Se derivan sin spawn() para que la misma semilla dé siempre los mismos flujos.
+        if not isinstance(semilla, np.random.SeedSequence):
+            semilla = np.random.SeedSequence(semilla)
+        self.semilla = semilla
+        semilla_llegadas, semilla_atencion = (
+            np.random.SeedSequence(semilla.entropy, spawn_key=semilla.spawn_key + (i,), pool_size=semilla.pool_size)
+            for i in range(2))
+        self.rng_llegadas = np.random.default_rng(semilla_llegadas)
+        self.rng_atencion = np.random.default_rng(semilla_atencion)
+        self.tamano_bloque = tamano_bloque
+        self.antitetico = antitetico  # Usar 1 - U y -Z: réplica antitética de la misma semilla
+        
+        self.prob_ingreso = prob_ingreso
+        self.media_atencion = media_atencion
+        self.desvio_atencion = desvio_atencion
+        self.tiempo_min_atencion = 60  # Mínimo 1 minuto
+        
+        # Bloques de variables estándar y sus valores transformados con los parámetros actuales
+        self.uniformes = np.empty(0)
+        self.normales = np.empty(0)
+        self.intervalos = []
+        self.atenciones = []
+        self.indice_intervalo = 0
+        self.indice_atencion = 0
+    
+    def configurar(self, prob_ingreso=None, media_atencion=None, desvio_atencion=None):
+        """Actualiza los parámetros y re-transforma lo que queda de los bloques actuales"""
+        if prob_ingreso is not None:
+            self.prob_ingreso = prob_ingreso
+            self.intervalos = self.transformar_intervalos(self.uniformes)
+        if media_atencion is not None or desvio_atencion is not None:
+            if media_atencion is not None:
+                self.media_atencion = media_atencion
+            if desvio_atencion is not None:
+                self.desvio_atencion = desvio_atencion
+            self.atenciones = self.transformar_atenciones(self.normales)
+    
+    def transformar_intervalos(self, uniformes):
+        """Convierte uniformes en (0, 1] en intervalos geométricos (segundos hasta la próxima llegada)"""
+        if self.prob_ingreso <= 0:
+            return [np.iinfo(np.int64).max] * len(uniformes)
+        intervalos = np.floor(np.log(uniformes) / np.log1p(-self.prob_ingreso)) + 1
+        return intervalos.astype(np.int64).tolist()
+    
+    def transformar_atenciones(self, normales):
+        """Convierte normales estándar en tiempos de atención acotados al mínimo"""
+        tiempos = np.maximum(self.media_atencion + self.desvio_atencion * normales, self.tiempo_min_atencion)
+        return tiempos.tolist()
+    
+    def intervalo_llegada(self):
+        """Devuelve los segundos hasta la próxima llegada"""
+        if self.indice_intervalo >= len(self.intervalos):
+            uniformes = self.rng_llegadas.random(self.tamano_bloque)
+            if not self.antitetico:
+                uniformes = 1.0 - uniformes
+            self.uniformes = np.maximum(uniformes, np.finfo(float).tiny)  # Evitar log(0)
+            self.intervalos = self.transformar_intervalos(self.uniformes)
+            self.indice_intervalo = 0
+        intervalo = self.intervalos[self.indice_intervalo]
+        self.indice_intervalo += 1
+        return intervalo
+    
+    def tiempo_atencion(self):
+        """Devuelve el próximo tiempo de atención en segundos"""
+        if self.indice_atencion >= len(self.atenciones):
+            self.normales = self.rng_atencion.standard_normal(self.tamano_bloque)
+            if self.antitetico:
+                self.normales = -self.normales
+            self.atenciones = self.transformar_atenciones(self.normales)
+            self.indice_atencion = 0
+        tiempo = self.atenciones[self.indice_atencion]
+        self.indice_atencion += 1
+        return tiempo
+
+class FlujoTraza:
+    """Llegadas y tiempos de atención leídos de una traza registrada en lugar de sorteados.
+
+    Recibe un iterable de bloques (llegadas, atenciones): segundos desde la
+    apertura, ordenados, y la duración de cada atención en segundos. Los bloques
+    se consumen a medida que avanza la simulación, así la traza no tiene que
+    estar completa en memoria. El simulador admite una llegada por segundo: las
+    que caen en un segundo ya ocupado se corren al siguiente libre. Para copiar
+    el flujo (instantanea, bifurcar) los bloques que faltan se leen a memoria.
+    """
+    def __init__(self, bloques):
+        self.bloques = iter(bloques)
+        self.llegadas = []
+        self.atenciones = []
+        self.indice = 0
+        self.ultima_llegada = -1
+        # Atenciones de los clientes con llegada ya programada: el motor por ticks programa la
+        # próxima llegada antes de registrar la actual
+        self.atenciones_programadas = deque()
+        self.antitetico = False
+        self.llegadas_corridas = 0
+    
+    def __getstate__(self):
+        # Un generador (leer_traza_csv, leer_traza_binaria) no se puede serializar: el original
+        # sigue con los bloques restantes ya en memoria y la copia recibe la misma lista
+        self.bloques = iter(list(self.bloques))
+        return self.__dict__.copy()
+    
+    def configurar(self, prob_ingreso=None, media_atencion=None, desvio_atencion=None):
+        if prob_ingreso is not None or media_atencion is not None or desvio_atencion is not None:
+            raise ValueError("Las llegadas y atenciones de una traza no dependen de parámetros")
+    
+    def intervalo_llegada(self):
+        """Devuelve los segundos desde la llegada anterior hasta la próxima de la traza"""
+        while self.indice >= len(self.llegadas):
+            try:
+                llegadas, atenciones = next(self.bloques)
+            except StopIteration:
+                return np.iinfo(np.int64).max  # Traza terminada: no hay más llegadas
+            self.llegadas = np.asarray(llegadas, dtype=np.int64).tolist()
+            self.atenciones = np.asarray(atenciones, dtype=float).tolist()
+            self.indice = 0
+        llegada = self.llegadas[self.indice]
+        if llegada <= self.ultima_llegada:
+            llegada = self.ultima_llegada + 1
+            self.llegadas_corridas += 1
+        intervalo = llegada - self.ultima_llegada
+        self.ultima_llegada = llegada
+        self.atenciones_programadas.append(self.atenciones[self.indice])
+        self.indice += 1
+        return intervalo
+    
+    def tiempo_atencion(self):
+        """Devuelve la atención registrada del cliente que está llegando"""
+        return self.atenciones_programadas.popleft()
+
+def segundos_traza(valor):
+    """Convierte una llegada de la traza (segundos o fecha y hora ISO) a segundos desde EPOCA_TRAZA"""
+    try:
+        return int(float(valor))
+    except ValueError:
+        fecha = datetime.fromisoformat(valor.strip()).replace(tzinfo=None)
+        return int((fecha - EPOCA_TRAZA).total_seconds())
+
+def leer_traza_csv(ruta, tamano_bloque=65536):
+    """Genera bloques (llegadas, atenciones) de un CSV con columnas llegada y atencion, sin cargarlo entero.
+
+    La llegada puede ser un número de segundos o una fecha y hora ISO
+    (2024-03-01 08:15:02); la atención se expresa en segundos.
+    """
+    with open(ruta, newline='', encoding='utf-8') as f:
+        lector = csv.DictReader(f)
+        while True:
+            filas = list(itertools.islice(lector, tamano_bloque))
+            if not filas:
+                return
+            yield (np.array([segundos_traza(fila['llegada']) for fila in filas], dtype=np.int64),
+                   np.array([float(fila['atencion']) for fila in filas]))
+
+def guardar_traza_binaria(ruta, bloques):
+    """Escribe bloques (llegadas, atenciones) como registros TIPO_TRAZA, por ejemplo para convertir un CSV"""
+    with open(ruta, 'wb') as f:
+        for llegadas, atenciones in bloques:
+            registros = np.empty(len(llegadas), dtype=TIPO_TRAZA)
+            registros['llegada'] = llegadas
+            registros['atencion'] = atenciones
+            registros.tofile(f)
+
+def leer_traza_binaria(ruta, tamano_bloque=1 << 20):
+    """Genera bloques (llegadas, atenciones) de un archivo de registros TIPO_TRAZA mapeado en memoria"""
+    if os.path.getsize(ruta) == 0:
+        return
+    registros = np.memmap(ruta, dtype=TIPO_TRAZA, mode='r')
+    for inicio in range(0, len(registros), tamano_bloque):
+        bloque = registros[inicio:inicio + tamano_bloque]
+        yield np.array(bloque['llegada']), np.array(bloque['atencion'])
+
+def dias_de_traza(bloques, hora_apertura=8 * 3600, hora_cierre=12 * 3600):
+    """Agrupa por día una traza ordenada por llegada, leyendo los bloques una sola vez.
+
+    Genera (día, llegadas en segundos desde la apertura, atenciones, cantidad de
+    llegadas fuera del horario de atención, que se descartan). Solo el día en
+    curso queda en memoria.
+    """
+    dia_actual = None
+    partes = []
+    
+    def cerrar_dia():
+        llegadas = np.concatenate([llegada for llegada, _ in partes]) - dia_actual * 86400 - hora_apertura
+        atenciones = np.concatenate([atencion for _, atencion in partes])
+        en_horario = (llegadas >= 0) & (llegadas < hora_cierre - hora_apertura)
+        return dia_actual, llegadas[en_horario], atenciones[en_horario], int(len(llegadas) - en_horario.sum())
+    
+    for llegadas, atenciones in bloques:
+        llegadas = np.asarray(llegadas, dtype=np.int64)
+        atenciones = np.asarray(atenciones, dtype=float)
+        dias = llegadas // 86400
+        cortes = np.flatnonzero(np.diff(dias)) + 1
+        for inicio, fin in zip(np.r_[0, cortes], np.r_[cortes, len(dias)]):
+            if inicio == fin:
+                continue
+            if dias[inicio] != dia_actual:
+                if partes:
+                    yield cerrar_dia()
+                dia_actual, partes = int(dias[inicio]), []
+            partes.append((llegadas[inicio:fin], atenciones[inicio:fin]))
+    if partes:
+        yield cerrar_dia()
+
+# Métodos del simulador que se miden por separado cuando se pide un perfil
+FASES_PERFIL = ('simular', 'procesar_boxes', 'asignar_cliente_a_box', 'verificar_abandonos', 'registrar_llegada',
+                'generar_intervalo_llegada', 'generar_tiempo_atencion', 'guardar_estado_animacion',
+                'mostrar_estado_progreso')
+
+class PerfilSimulacion:
+    """Tiempos acumulados por fase y contadores de una simulación.
+
+    Se activa reemplazando los métodos de la instancia del simulador por
+    envolturas que miden cada llamada; sin perfil los métodos quedan intactos y
+    no hay ningún costo. Cada callback se llama como callback(fase, segundos,
+    simulador) al terminar cada llamada medida.
+    """
+    def __init__(self, callbacks=()):
+        self.callbacks = list(callbacks)
+        self.fases = {}  # fase -> [segundos acumulados, llamadas]
+        self.contadores = {
+            'instantes_procesados': 0,  # Segundos en los que se procesó algo (ticks o instantes con eventos)
+            'cola_maxima': 0,
+            'clientes_registrados': 0,
+            'ampliaciones_memoria': 0,  # Veces que se duplicaron las columnas de clientes o de la serie
+        }
+    
+    def instrumentar(self, simulador):
+        """Reemplaza los métodos de las fases del simulador por versiones medidas"""
+        for fase in FASES_PERFIL:
+            self.envolver(simulador, fase, simulador)
+        self.envolver(simulador, 'procesar_boxes', simulador, contador='instantes_procesados', medir=False)
+        self.envolver(simulador, 'registrar_llegada', simulador, medir=False,
+                      despues=lambda: self.maximo('cola_maxima', len(simulador.cola)))
+        self.envolver(simulador.clientes, 'alta', simulador, contador='clientes_registrados', medir=False)
+        self.envolver(simulador.clientes, 'agrandar', simulador, contador='ampliaciones_memoria', medir=False)
+        self.envolver(simulador.serie_temporal, 'agrandar', simulador, contador='ampliaciones_memoria',
+                      medir=False)
+    
+    def envolver(self, objeto, nombre, simulador, contador=None, despues=None, medir=True):
+        """Reemplaza objeto.nombre por una envoltura que mide el tiempo y/o actualiza contadores"""
+        metodo = getattr(objeto, nombre)
+        
+        if not medir:
+            def envoltura(*args, **kwargs):
+                resultado = metodo(*args, **kwargs)
+                if contador is not None:
+                    self.contadores[contador] += 1
+                if despues is not None:
+                    despues()
+                return resultado
+        else:
+            acumulado = self.fases.setdefault(nombre, [0.0, 0])
+            reloj = time.perf_counter
+            callbacks = self.callbacks
+            
+            def envoltura(*args, **kwargs):
+                inicio = reloj()
+                resultado = metodo(*args, **kwargs)
+                segundos = reloj() - inicio
+                acumulado[0] += segundos
+                acumulado[1] += 1
+                for callback in callbacks:
+                    callback(nombre, segundos, simulador)
+                return resultado
+        setattr(objeto, nombre, envoltura)
+    
+    def maximo(self, contador, valor):
+        if valor > self.contadores[contador]:
+            self.contadores[contador] = valor
+    
+    def resumen(self):
+        """Devuelve fases (segundos, llamadas, microsegundos por llamada) y contadores como diccionario"""
+        fases = {fase: {'segundos': segundos, 'llamadas': llamadas,
+                        'microsegundos_por_llamada': 1e6 * segundos / llamadas if llamadas else 0.0}
+                 for fase, (segundos, llamadas) in self.fases.items()}
+        return {'fases': fases, 'contadores': dict(self.contadores)}
+    
+    def mostrar(self):
+        """Imprime las fases ordenadas por tiempo y los contadores"""
+        resumen = self.resumen()
+        total = resumen['fases'].get('simular', {}).get('segundos') or 1e-12
+        print("\n" + "=" * 60)
+        print("PERFIL DE LA SIMULACIÓN (los tiempos incluyen las fases anidadas)")
+        print("=" * 60)
+        print(f"{'Fase':<28} {'Segundos':>10} {'%':>6} {'Llamadas':>10} {'µs/llamada':>10}")
+        for fase, datos in sorted(resumen['fases'].items(), key=lambda item: -item[1]['segundos']):
+            print(f"{fase:<28} {datos['segundos']:>10.4f} {100 * datos['segundos'] / total:>6.1f} "
+                  f"{datos['llamadas']:>10} {datos['microsegundos_por_llamada']:>10.2f}")
+        for contador, valor in resumen['contadores'].items():
+            print(f"• {contador.replace('_', ' ').capitalize()}: {valor}")
+
 class SimuladorAtencionPublico:
     """Simulador principal del sistema de atención al público"""
     
-    def __init__(self, num_boxes=1):
+    def __init__(self, num_boxes=1, motor='ticks', semilla=None, asignacion_multiple=False, guardar_traza=True,
+                 estadistica=EstadisticaEnLinea, antitetico=False, intervalo_muestreo=60, almacen=None,
+                 prob_ingreso=1/144, tiempo_max_espera=30 * 60, media_atencion=10 * 60, desvio_atencion=5 * 60,
+                 costo_box=1000, perdida_cliente=10000, hora_cierre=12 * 3600, perfil=None, traza=None):
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor!r} (opciones: {', '.join(MOTORES)})")
+        
         # Parámetros del sistema
         self.num_boxes = num_boxes
+        self.motor = motor
+        self.asignacion_multiple = asignacion_multiple  # Ocupar todos los boxes libres en el mismo segundo
+        self.intervalo_muestreo = intervalo_muestreo  # Segundos entre muestras de la serie (0 = en cada cambio)
         self.hora_apertura = 8 * 3600  # 8:00 AM en segundos
-        self.hora_cierre = 12 * 3600   # 12:00 PM en segundos
-        self.duracion_simulacion = self.hora_cierre - self.hora_apertura  # 4 horas
-        self.prob_ingreso = 1/144  # Probabilidad por segundo
-        self.tiempo_max_espera = 30 * 60  # 30 minutos en segundos
-        self.media_atencion = 10 * 60  # 10 minutos en segundos
-        self.desvio_atencion = 5 * 60   # 5 minutos en segundos
-        self.costo_box = 1000
-        self.perdida_cliente = 10000
+        self.hora_cierre = hora_cierre   # Segundos desde las 0:00 (por defecto 12:00 PM)
+        self.duracion_simulacion = self.hora_cierre - self.hora_apertura  # 4 horas por defecto
+        self.prob_ingreso = prob_ingreso  # Probabilidad por segundo (por defecto 1/144)
+        self.tiempo_max_espera = tiempo_max_espera  # Segundos (por defecto 30 minutos)
+        self.media_atencion = media_atencion  # Segundos (por defecto 10 minutos)
+        self.desvio_atencion = desvio_atencion   # Segundos (por defecto 5 minutos)
+        self.costo_box = costo_box
+        self.perdida_cliente = perdida_cliente
+        
+        # Generador aleatorio propio del simulador, o una traza registrada (bloques de llegadas y atenciones)
+        if traza is not None:
+            self.flujo = FlujoTraza(traza)
+        else:
+            self.flujo = FlujoAleatorio(self.prob_ingreso, self.media_atencion, self.desvio_atencion, semilla,
+                                        antitetico=antitetico)
         
         # Estado del sistema
         self.tiempo_actual = 0
         self.boxes = [Box(i) for i in range(num_boxes)]
-        self.cola = deque()
-        self.clientes = []
+        self.boxes_libres = list(range(num_boxes))  # Heap de ids: se asigna siempre el box libre de menor id
+        self.fin_atenciones = []  # Heap de (tiempo_fin_atencion, id_box) de los boxes ocupados
+        self.cola = ColaEspera()
+        self.clientes = RegistroClientes(guardar_traza)
+        self.almacen = almacen  # AlmacenResultados donde se guardan clientes y serie temporal (opcional)
+        if almacen is not None:
+            self.clientes.destino = almacen.tabla('clientes', self.clientes.tipos())
         self.id_cliente_contador = 0
+        self.proxima_llegada = self.generar_intervalo_llegada() - 1  # Puede haber llegada en el segundo 0
+        
+        # Calendario del motor por eventos: heap de (tiempo, tipo_evento)
+        self.calendario = []
+        self.jornada_iniciada = False
+        self.proxima_muestra = 0
+        self.proximo_progreso = 0
+        self.tiempo_procesado = 0  # Los instantes anteriores ya se simularon (ver avanzar)
         
         # Estadísticas
         self.clientes_ingresados = 0
         self.clientes_atendidos = 0
         self.clientes_abandonaron = 0
-        self.tiempos_atencion = []
-        self.tiempos_espera = []
+        self.estadisticas_atencion = estadistica()
+        self.estadisticas_espera = estadistica()
         
         # Para animación
-        self.historial_animacion = []
+        self.serie_temporal = SerieTemporal()
+        
+        # Perfil por fases (opcional): True o una PerfilSimulacion con callbacks
+        self.perfil = PerfilSimulacion() if perfil is True else perfil
+        if self.perfil is not None:
+            self.perfil.instrumentar(self)
     
     def generar_tiempo_atencion(self):
-        """Genera tiempo de atención según distribución normal"""
-        tiempo = np.random.normal(self.media_atencion, self.desvio_atencion)
-        return max(60, tiempo)  # Mínimo 1 minuto
+        """Genera tiempo de atención según distribución normal (mínimo 1 minuto)"""
+        return self.flujo.tiempo_atencion()
     
     def llegada_cliente(self):
-        """Verifica si llega un nuevo cliente"""
-        return random.random() < self.prob_ingreso
+        """Verifica si llega un nuevo cliente en el segundo actual"""
+        if self.tiempo_actual < self.proxima_llegada:
+            return False
+        self.proxima_llegada = self.tiempo_actual + self.generar_intervalo_llegada()
+        return True
+    
+    def generar_intervalo_llegada(self):
+        """Genera los segundos hasta la próxima llegada (geométrica, equivalente a un Bernoulli por segundo)"""
+        return self.flujo.intervalo_llegada()
+    
+    def registrar_llegada(self):
+        """Ingresa un nuevo cliente a la cola en el instante actual"""
+        # La duración de la atención se sortea al llegar: queda ligada al cliente y no al
+        # orden de asignación, así distintas cantidades de boxes comparten los mismos números
+        cliente = self.clientes.alta(self.id_cliente_contador, self.tiempo_actual,
+                                     self.generar_tiempo_atencion())
+        self.cola.append(cliente, self.tiempo_actual + self.tiempo_max_espera)
+        self.id_cliente_contador += 1
+        self.clientes_ingresados += 1
     
     def asignar_cliente_a_box(self):
-        """Asigna cliente de la cola a un box disponible"""
-        if self.cola:
-            for box in self.boxes:
-                if not box.ocupado:
-                    cliente = self.cola.popleft()
-                    cliente.tiempo_inicio_atencion = self.tiempo_actual
-                    cliente.tiempo_espera = self.tiempo_actual - cliente.tiempo_llegada
-                    cliente.box_asignado = box.id
-                    
-                    tiempo_atencion = self.generar_tiempo_atencion()
-                    box.ocupado = True
-                    box.cliente_actual = cliente
-                    box.tiempo_fin_atencion = self.tiempo_actual + tiempo_atencion
-                    
-                    self.tiempos_espera.append(cliente.tiempo_espera)
-                    break
+        """Asigna clientes de la cola a boxes disponibles (devuelve cuántos se asignaron)"""
+        asignados = 0
+        while self.cola and self.boxes_libres:
+            box = self.boxes[heapq.heappop(self.boxes_libres)]
+            cliente = self.cola.popleft()
+            tiempo_espera = self.tiempo_actual - int(self.clientes.llegada[cliente])
+            self.clientes.inicio[cliente] = self.tiempo_actual
+            self.clientes.box[cliente] = box.id
+            self.clientes.estado[cliente] = ESTADO_EN_ATENCION
+            
+            tiempo_atencion = float(self.clientes.atencion[cliente])
+            box.ocupado = True
+            box.cliente_actual = cliente
+            box.tiempo_fin_atencion = self.tiempo_actual + tiempo_atencion
+            heapq.heappush(self.fin_atenciones, (box.tiempo_fin_atencion, box.id))
+            
+            self.estadisticas_espera.agregar(tiempo_espera)
+            asignados += 1
+            if not self.asignacion_multiple:
+                break
+        return asignados
     
     def procesar_boxes(self):
-        """Procesa la atención en cada box"""
-        for box in self.boxes:
-            if box.ocupado and self.tiempo_actual >= box.tiempo_fin_atencion:
-                # Cliente termina atención
-                cliente = box.cliente_actual
-                cliente.tiempo_fin_atencion = self.tiempo_actual
-                cliente.atendido = True
-                
-                tiempo_atencion = cliente.tiempo_fin_atencion - cliente.tiempo_inicio_atencion
-                self.tiempos_atencion.append(tiempo_atencion)
-                
-                box.ocupado = False
-                box.cliente_actual = None
-                box.tiempo_fin_atencion = None
-                box.clientes_atendidos += 1
-                box.tiempo_total_atencion += tiempo_atencion
-                
-                self.clientes_atendidos += 1
+        """Procesa las atenciones que terminan en el instante actual"""
+        while self.fin_atenciones and self.fin_atenciones[0][0] <= self.tiempo_actual:
+            _, id_box = heapq.heappop(self.fin_atenciones)
+            box = self.boxes[id_box]
+            
+            # Cliente termina atención
+            cliente = box.cliente_actual
+            self.clientes.fin[cliente] = self.tiempo_actual
+            self.clientes.estado[cliente] = ESTADO_ATENDIDO
+            
+            tiempo_atencion = self.tiempo_actual - int(self.clientes.inicio[cliente])
+            self.estadisticas_atencion.agregar(tiempo_atencion)
+            self.clientes.liberar(cliente)
+            
+            box.ocupado = False
+            box.cliente_actual = None
+            box.tiempo_fin_atencion = None
+            box.clientes_atendidos += 1
+            box.tiempo_total_atencion += tiempo_atencion
+            if id_box < self.num_boxes:  # Un box que se cerró a mitad de jornada no vuelve a estar libre
+                heapq.heappush(self.boxes_libres, id_box)
+            
+            self.clientes_atendidos += 1
     
     def verificar_abandonos(self):
         """Verifica si algún cliente abandona por tiempo de espera"""
-        clientes_a_remover = []
-        for i, cliente in enumerate(self.cola):
-            tiempo_espera = self.tiempo_actual - cliente.tiempo_llegada
-            if tiempo_espera >= self.tiempo_max_espera:
-                cliente.abandono = True
-                clientes_a_remover.append(i)
-                self.clientes_abandonaron += 1
-        
-        # Remover clientes que abandonan (de atrás hacia adelante)
-        for i in reversed(clientes_a_remover):
-            del list(self.cola)[i]
-        
-        # Reconstruir cola sin los clientes que abandonaron
-        nueva_cola = deque([cliente for cliente in self.cola if not cliente.abandono])
-        self.cola = nueva_cola
+        # Solo los clientes del frente pueden haber alcanzado el tiempo máximo de espera
+        for cliente in self.cola.extraer_vencidos(self.tiempo_actual):
+            self.clientes.estado[cliente] = ESTADO_ABANDONO
+            self.clientes.liberar(cliente)
+            self.clientes_abandonaron += 1
     
     def guardar_estado_animacion(self):
         """Guarda el estado actual para la animación"""
-        estado = {
-            'tiempo': self.tiempo_actual,
-            'cola_size': len(self.cola),
-            'boxes_ocupados': sum(1 for box in self.boxes if box.ocupado),
-            'clientes_atendidos': self.clientes_atendidos,
-            'clientes_abandonaron': self.clientes_abandonaron
-        }
-        self.historial_animacion.append(estado)
+        self.serie_temporal.agregar(self.tiempo_actual, len(self.cola), len(self.fin_atenciones),
+                                    self.clientes_atendidos, self.clientes_abandonaron)
+    
+    def registrar_cambio(self):
+        """Sin intervalo de muestreo, guarda el estado si cambió desde la última muestra"""
+        if self.intervalo_muestreo:
+            return
+        estado = (len(self.cola), len(self.fin_atenciones),
+                  self.clientes_atendidos, self.clientes_abandonaron)
+        if self.serie_temporal.ultima() != estado:
+            self.guardar_estado_animacion()
     
-    def simular(self, mostrar_progreso=True):
-        """Ejecuta la simulación completa"""
-        print(f"Iniciando simulación con {self.num_boxes} boxes...")
-        print("=" * 50)
+    def mostrar_estado_progreso(self):
+        """Muestra el estado del sistema en el instante actual"""
+        hora = 8 + self.tiempo_actual // 3600
+        minuto = (self.tiempo_actual % 3600) // 60
+        print(f"Tiempo: {hora:02d}:{minuto:02d} | "
+              f"Cola: {len(self.cola)} | "
+              f"Atendidos: {self.clientes_atendidos} | "
+              f"Abandonos: {self.clientes_abandonaron}")
+    
+    def simular(self, mostrar_progreso=True, imprimir=True):
+        """Ejecuta la simulación completa con el motor configurado"""
+        if imprimir:
+            print(f"Iniciando simulación con {self.num_boxes} boxes...")
+            print("=" * 50)
+        
+        if self.motor == 'eventos':
+            self.simular_eventos(mostrar_progreso)
+        else:
+            self.simular_ticks(mostrar_progreso)
         
-        for segundo in range(self.duracion_simulacion):
+        self.finalizar_jornada()
+        if imprimir:
+            print("\nSimulación completada!")
+    
+    def simular_ticks(self, mostrar_progreso=True):
+        """Motor de referencia: avanza el reloj segundo a segundo"""
+        self.avanzar_ticks(self.duracion_simulacion, mostrar_progreso)
+        
+        # Continuar atendiendo clientes después del cierre (solo los que ya están)
+        tiempo_extra = 0
+        while self.fin_atenciones and tiempo_extra < 3600:  # Máximo 1 hora extra
+            self.tiempo_actual = self.duracion_simulacion + tiempo_extra
+            self.procesar_boxes()
+            self.registrar_cambio()
+            tiempo_extra += 1
+    
+    def avanzar_ticks(self, tiempo_limite, mostrar_progreso=False):
+        """Procesa segundo a segundo los instantes pendientes anteriores a tiempo_limite"""
+        for segundo in range(self.tiempo_procesado, tiempo_limite):
             self.tiempo_actual = segundo
             
             # Solo aceptar nuevos clientes durante horario de atención
             if segundo < self.duracion_simulacion:
                 if self.llegada_cliente():
-                    nuevo_cliente = Cliente(self.id_cliente_contador, segundo)
-                    self.clientes.append(nuevo_cliente)
-                    self.cola.append(nuevo_cliente)
-                    self.id_cliente_contador += 1
-                    self.clientes_ingresados += 1
+                    self.registrar_llegada()
             
             # Procesar atención en boxes
             self.procesar_boxes()
@@ -166,37 +1097,251 @@ class SimuladorAtencionPublico:
             # Verificar abandonos
             self.verificar_abandonos()
             
-            # Guardar estado para animación (cada 60 segundos)
-            if segundo % 60 == 0:
+            # Guardar estado para animación (cada intervalo de muestreo o en cada cambio)
+            if not self.intervalo_muestreo:
+                self.registrar_cambio()
+            elif segundo % self.intervalo_muestreo == 0:
                 self.guardar_estado_animacion()
             
             # Mostrar progreso cada 30 minutos simulados
             if mostrar_progreso and segundo % 1800 == 0:
-                hora = 8 + segundo // 3600
-                minuto = (segundo % 3600) // 60
-                print(f"Tiempo: {hora:02d}:{minuto:02d} | "
-                      f"Cola: {len(self.cola)} | "
-                      f"Atendidos: {self.clientes_atendidos} | "
-                      f"Abandonos: {self.clientes_abandonaron}")
+                self.mostrar_estado_progreso()
+        self.tiempo_procesado = max(self.tiempo_procesado, tiempo_limite)
+    
+    def simular_eventos(self, mostrar_progreso=True):
+        """Motor por eventos: el reloj salta directamente al próximo evento del calendario"""
+        if not self.jornada_iniciada:
+            self.iniciar_calendario()
+        self.avanzar_hasta(self.duracion_simulacion, mostrar_progreso)
         
-        # Continuar atendiendo clientes después del cierre (solo los que ya están)
-        tiempo_extra = 0
-        while any(box.ocupado for box in self.boxes) and tiempo_extra < 3600:  # Máximo 1 hora extra
-            self.tiempo_actual = self.duracion_simulacion + tiempo_extra
+        # Después del cierre solo se terminan las atenciones en curso (máximo 1 hora extra)
+        limite = self.duracion_simulacion + 3600
+        self.calendario = []
+        while self.fin_atenciones and math.ceil(self.fin_atenciones[0][0]) < limite:
+            self.tiempo_actual = math.ceil(self.fin_atenciones[0][0])
             self.procesar_boxes()
-            tiempo_extra += 1
+            self.registrar_cambio()
+    
+    def iniciar_calendario(self):
+        """Carga en el calendario la primera llegada del día"""
+        self.calendario = []
+        self.jornada_iniciada = True
+        self.proxima_muestra = 0
+        self.proximo_progreso = 0
+        if self.proxima_llegada < self.duracion_simulacion:
+            heapq.heappush(self.calendario, (self.proxima_llegada, EVENTO_LLEGADA))
+    
+    def avanzar_hasta(self, tiempo_limite, mostrar_progreso=False):
+        """Procesa los eventos del calendario anteriores a tiempo_limite"""
+        while True:
+            tiempo = self.proximo_instante()
+            if tiempo is None or tiempo >= tiempo_limite:
+                break
+            self.registrar_muestras_hasta(tiempo, mostrar_progreso)
+            
+            # Agrupar todos los eventos del mismo segundo
+            hay_llegada = False
+            while self.calendario and self.calendario[0][0] == tiempo:
+                _, tipo = heapq.heappop(self.calendario)
+                hay_llegada = hay_llegada or tipo == EVENTO_LLEGADA
+            
+            self.tiempo_actual = tiempo
+            self.procesar_instante(hay_llegada)
+        
+        self.registrar_muestras_hasta(min(tiempo_limite, self.duracion_simulacion), mostrar_progreso)
+        self.tiempo_procesado = max(self.tiempo_procesado, tiempo_limite)
+    
+    def proximo_instante(self):
+        """Devuelve el próximo segundo con eventos (calendario o fin de atención), o None"""
+        tiempo = self.calendario[0][0] if self.calendario else None
+        if self.fin_atenciones:
+            # El box se libera en el primer segundo entero posterior al fin de la atención
+            fin = math.ceil(self.fin_atenciones[0][0])
+            if tiempo is None or fin < tiempo:
+                tiempo = fin
+        return tiempo
+    
+    def procesar_instante(self, hay_llegada):
+        """Procesa un segundo con eventos, en el mismo orden que un tick del motor de referencia"""
+        if hay_llegada:
+            self.registrar_llegada()
+            self.proxima_llegada = self.tiempo_actual + self.generar_intervalo_llegada()
+            if self.proxima_llegada < self.duracion_simulacion:
+                heapq.heappush(self.calendario, (self.proxima_llegada, EVENTO_LLEGADA))
+            heapq.heappush(self.calendario, (self.tiempo_actual + self.tiempo_max_espera, EVENTO_ABANDONO))
+        
+        self.procesar_boxes()
+        asignados = self.asignar_cliente_a_box()
+        self.verificar_abandonos()
+        if not self.intervalo_muestreo:
+            self.registrar_cambio()
+        
+        # Sin asignación múltiple se asigna un cliente por segundo: reintentar en el siguiente
+        if asignados and self.cola and self.boxes_libres:
+            heapq.heappush(self.calendario, (self.tiempo_actual + 1, EVENTO_ASIGNACION))
+    
+    def registrar_muestras_hasta(self, tiempo, mostrar_progreso=False):
+        """Guarda las muestras periódicas y el progreso (cada 30 minutos) pendientes anteriores a tiempo"""
+        tiempo_evento = self.tiempo_actual
+        # Entre eventos el estado no cambia: las muestras reflejan el estado actual
+        if self.intervalo_muestreo:
+            while self.proxima_muestra < tiempo:
+                self.tiempo_actual = self.proxima_muestra
+                self.guardar_estado_animacion()
+                self.proxima_muestra += self.intervalo_muestreo
+        elif not len(self.serie_temporal) and tiempo > 0:
+            # Muestreando en cada cambio, la serie igual empieza con el estado inicial
+            self.tiempo_actual = 0
+            self.guardar_estado_animacion()
+        while self.proximo_progreso < tiempo:
+            if mostrar_progreso:
+                self.tiempo_actual = self.proximo_progreso
+                self.mostrar_estado_progreso()
+            self.proximo_progreso += 1800
+        self.tiempo_actual = tiempo_evento
+    
+    def avanzar(self, tiempo, mostrar_progreso=False):
+        """Simula los instantes anteriores a tiempo (segundos desde la apertura) sin cerrar la jornada.
+
+        Sirve para llegar hasta un punto intermedio, tomar una instantánea o
+        bifurcar, y después seguir con simular().
+        """
+        tiempo = min(tiempo, self.duracion_simulacion)
+        if self.motor == 'eventos':
+            if not self.jornada_iniciada:
+                self.iniciar_calendario()
+            self.avanzar_hasta(tiempo, mostrar_progreso)
+        else:
+            self.avanzar_ticks(tiempo, mostrar_progreso)
+    
+    def configurar(self, num_boxes=None, prob_ingreso=None, tiempo_max_espera=None, media_atencion=None,
+                   desvio_atencion=None, costo_box=None, perdida_cliente=None, hora_cierre=None):
+        """Cambia parámetros a mitad de jornada; rigen desde el primer instante todavía no simulado.
+
+        Los boxes que se cierran terminan la atención en curso. Los tiempos de
+        atención cambian para los clientes que lleguen después (se sortean al
+        llegar) y el nuevo tiempo máximo de espera rige también para los que ya
+        están en la cola, contado desde su llegada.
+        """
+        ahora = self.tiempo_procesado
+        if hora_cierre is not None:
+            if hora_cierre - self.hora_apertura < ahora:
+                raise ValueError("La nueva hora de cierre ya pasó")
+            self.hora_cierre = hora_cierre
+            self.duracion_simulacion = hora_cierre - self.hora_apertura
+        if costo_box is not None:
+            self.costo_box = costo_box
+        if perdida_cliente is not None:
+            self.perdida_cliente = perdida_cliente
+        if media_atencion is not None or desvio_atencion is not None:
+            self.media_atencion = self.media_atencion if media_atencion is None else media_atencion
+            self.desvio_atencion = self.desvio_atencion if desvio_atencion is None else desvio_atencion
+            self.flujo.configurar(media_atencion=media_atencion, desvio_atencion=desvio_atencion)
+        if prob_ingreso is not None:
+            # Las llegadas no tienen memoria: se vuelve a sortear la próxima con la nueva tasa
+            self.prob_ingreso = prob_ingreso
+            self.flujo.configurar(prob_ingreso=prob_ingreso)
+            self.proxima_llegada = ahora + self.generar_intervalo_llegada() - 1
+        
+        if num_boxes is not None:
+            for id_box in range(self.num_boxes, num_boxes):
+                if id_box == len(self.boxes):
+                    self.boxes.append(Box(id_box))
+                if not self.boxes[id_box].ocupado:
+                    heapq.heappush(self.boxes_libres, id_box)
+            self.num_boxes = num_boxes
+            self.boxes_libres = [id_box for id_box in self.boxes_libres if id_box < num_boxes]
+            heapq.heapify(self.boxes_libres)
         
-        # Marcar clientes restantes en cola como no atendidos
+        if tiempo_max_espera is not None:
+            # Vencimientos recalculados desde la llegada: siguen ordenados como la cola
+            self.tiempo_max_espera = tiempo_max_espera
+            self.cola.vencimientos = deque(int(self.clientes.llegada[cliente]) + tiempo_max_espera
+                                           for cliente in self.cola)
+        
+        if self.motor == 'eventos' and self.jornada_iniciada:
+            # Rehacer el calendario: llegada pendiente, abandonos y asignación en el primer instante libre
+            self.calendario = [(tiempo, tipo) for tiempo, tipo in self.calendario if tipo != EVENTO_LLEGADA]
+            if self.proxima_llegada < self.duracion_simulacion:
+                self.calendario.append((max(self.proxima_llegada, ahora), EVENTO_LLEGADA))
+            self.calendario += [(max(vencimiento, ahora), EVENTO_ABANDONO) for vencimiento in self.cola.vencimientos]
+            if self.cola and self.boxes_libres:
+                self.calendario.append((ahora, EVENTO_ASIGNACION))
+            heapq.heapify(self.calendario)
+    
+    def __getstate__(self):
+        # Las envolturas del perfil, sus callbacks y el almacén no se copian
+        return dict(estado_sin_envolturas(self), perfil=None, almacen=None)
+    
+    def instantanea(self):
+        """Serializa el estado completo: reloj, boxes, cola, contadores, calendario y generadores aleatorios"""
+        return pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def bifurcar(self, **cambios):
+        """Devuelve una copia independiente en el estado actual, con los parámetros cambiados (ver configurar).
+
+        La copia sigue con los mismos flujos aleatorios que el original, así
+        las ramas comparten números aleatorios comunes.
+        """
+        rama = pickle.loads(self.instantanea())
+        rama.configurar(**cambios)
+        return rama
+    
+    def finalizar_jornada(self):
+        """Marca los clientes restantes en cola como no atendidos"""
         for cliente in self.cola:
-            cliente.abandono = True
+            self.clientes.estado[cliente] = ESTADO_ABANDONO
+            self.clientes.liberar(cliente)
             self.clientes_abandonaron += 1
         
-        print("\nSimulación completada!")
+        if self.almacen is not None:
+            # Los que siguen en atención después de la hora extra también quedan guardados
+            for box in self.boxes:
+                if box.cliente_actual is not None:
+                    self.clientes.exportar(box.cliente_actual)
+            self.almacen.tabla('serie', self.serie_temporal.tipos()).agregar_columnas(
+                **self.serie_temporal.columnas())
+    
+    def parametros(self):
+        """Devuelve los parámetros que determinan los resultados (sin el motor ni la semilla)"""
+        return {
+            'num_boxes': self.num_boxes,
+            'asignacion_multiple': self.asignacion_multiple,
+            'antitetico': self.flujo.antitetico,
+            'hora_apertura': self.hora_apertura,
+            'hora_cierre': self.hora_cierre,
+            'prob_ingreso': self.prob_ingreso,
+            'tiempo_max_espera': self.tiempo_max_espera,
+            'media_atencion': self.media_atencion,
+            'desvio_atencion': self.desvio_atencion,
+            'costo_box': self.costo_box,
+            'perdida_cliente': self.perdida_cliente,
+        }
     
-    def generar_reporte(self):
+    def generar_reporte(self, imprimir=True):
         """Genera el reporte final de la simulación"""
         costo_total = (self.num_boxes * self.costo_box) + (self.clientes_abandonaron * self.perdida_cliente)
         
+        if imprimir:
+            self.mostrar_reporte(costo_total)
+            if self.perfil is not None:
+                self.perfil.mostrar()
+        
+        reporte = {
+            'clientes_ingresados': self.clientes_ingresados,
+            'clientes_atendidos': self.clientes_atendidos,
+            'clientes_abandonaron': self.clientes_abandonaron,
+            'costo_total': costo_total,
+            'tasa_atencion': (self.clientes_atendidos / self.clientes_ingresados) * 100 if self.clientes_ingresados > 0 else 0,
+            'espera': self.estadisticas_espera.resumen(),
+            'atencion': self.estadisticas_atencion.resumen()
+        }
+        if self.perfil is not None:
+            reporte['perfil'] = self.perfil.resumen()
+        return reporte
+    
+    def mostrar_reporte(self, costo_total):
+        """Imprime el reporte final de la simulación"""
         print("\n" + "=" * 60)
         print("REPORTE FINAL DE SIMULACIÓN")
         print("=" * 60)
@@ -205,16 +1350,19 @@ class SimuladorAtencionPublico:
         print(f"2) Clientes atendidos: {self.clientes_atendidos}")
         print(f"3) Clientes no atendidos (abandonaron): {self.clientes_abandonaron}")
         
-        if self.tiempos_atencion:
-            print(f"4) Tiempo mínimo de atención: {min(self.tiempos_atencion)/60:.2f} minutos")
-            print(f"5) Tiempo máximo de atención: {max(self.tiempos_atencion)/60:.2f} minutos")
+        atencion = self.estadisticas_atencion
+        espera = self.estadisticas_espera
+        
+        if atencion.n:
+            print(f"4) Tiempo mínimo de atención: {atencion.minimo/60:.2f} minutos")
+            print(f"5) Tiempo máximo de atención: {atencion.maximo/60:.2f} minutos")
         else:
             print("4) Tiempo mínimo de atención: N/A")
             print("5) Tiempo máximo de atención: N/A")
         
-        if self.tiempos_espera:
-            print(f"6) Tiempo mínimo de espera: {min(self.tiempos_espera)/60:.2f} minutos")
-            print(f"7) Tiempo máximo de espera: {max(self.tiempos_espera)/60:.2f} minutos")
+        if espera.n:
+            print(f"6) Tiempo mínimo de espera: {espera.minimo/60:.2f} minutos")
+            print(f"7) Tiempo máximo de espera: {espera.maximo/60:.2f} minutos")
         else:
             print("6) Tiempo mínimo de espera: 0.00 minutos")
             print("7) Tiempo máximo de espera: N/A")
@@ -228,265 +1376,875 @@ class SimuladorAtencionPublico:
             tasa_atencion = (self.clientes_atendidos / self.clientes_ingresados) * 100
             print(f"\nTasa de atención: {tasa_atencion:.2f}%")
         
-        if self.tiempos_espera:
-            tiempo_promedio_espera = np.mean(self.tiempos_espera) / 60
+        if espera.n:
+            tiempo_promedio_espera = espera.media / 60
             print(f"Tiempo promedio de espera: {tiempo_promedio_espera:.2f} minutos")
+            print(f"Percentiles de espera (p50 / p90 / p99): {espera.cuantil(0.5)/60:.2f} / "
+                  f"{espera.cuantil(0.9)/60:.2f} / {espera.cuantil(0.99)/60:.2f} minutos")
         
-        if self.tiempos_atencion:
-            tiempo_promedio_atencion = np.mean(self.tiempos_atencion) / 60
+        if atencion.n:
+            tiempo_promedio_atencion = atencion.media / 60
             print(f"Tiempo promedio de atención: {tiempo_promedio_atencion:.2f} minutos")
         
         print("=" * 60)
-        
-        return {
-            'clientes_ingresados': self.clientes_ingresados,
-            'clientes_atendidos': self.clientes_atendidos,
-            'clientes_abandonaron': self.clientes_abandonaron,
-            'costo_total': costo_total,
-            'tasa_atencion': (self.clientes_atendidos / self.clientes_ingresados) * 100 if self.clientes_ingresados > 0 else 0
-        }
     
     def crear_animacion(self, velocidad=1, guardar_archivo=False):
-        """Crea una animación del proceso simulado"""
-        if not self.historial_animacion:
-            print("No hay datos de animación disponibles.")
-            return
-        
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-        fig.suptitle(f'Simulación Sistema de Atención - {self.num_boxes} Boxes', fontsize=14)
-        
-        # Preparar datos para gráficos
-        tiempos = [estado['tiempo']/3600 + 8 for estado in self.historial_animacion]  # Convertir a horas
-        cola_sizes = [estado['cola_size'] for estado in self.historial_animacion]
-        boxes_ocupados = [estado['boxes_ocupados'] for estado in self.historial_animacion]
-        atendidos = [estado['clientes_atendidos'] for estado in self.historial_animacion]
-        abandonos = [estado['clientes_abandonaron'] for estado in self.historial_animacion]
-        
-        def animate(frame):
-            # Limpiar axes
-            ax1.clear()
-            ax2.clear()
-            ax3.clear()
-            ax4.clear()
-            
-            # Gráfico 1: Tamaño de cola en tiempo real
-            ax1.plot(tiempos[:frame+1], cola_sizes[:frame+1], 'b-', linewidth=2)
-            ax1.set_title('Tamaño de Cola')
-            ax1.set_xlabel('Hora del día')
-            ax1.set_ylabel('Clientes en cola')
-            ax1.grid(True)
-            ax1.set_xlim(8, 12)
-            if cola_sizes:
-                ax1.set_ylim(0, max(cola_sizes) + 2)
-            
-            # Gráfico 2: Boxes ocupados
-            ax2.plot(tiempos[:frame+1], boxes_ocupados[:frame+1], 'g-', linewidth=2)
-            ax2.set_title('Boxes Ocupados')
-            ax2.set_xlabel('Hora del día')
-            ax2.set_ylabel('Boxes en uso')
-            ax2.grid(True)
-            ax2.set_xlim(8, 12)
-            ax2.set_ylim(0, self.num_boxes + 1)
-            
-            # Gráfico 3: Clientes atendidos acumulado
-            ax3.plot(tiempos[:frame+1], atendidos[:frame+1], 'orange', linewidth=2)
-            ax3.set_title('Clientes Atendidos (Acumulado)')
-            ax3.set_xlabel('Hora del día')
-            ax3.set_ylabel('Total atendidos')
-            ax3.grid(True)
-            ax3.set_xlim(8, 12)
-            if atendidos:
-                ax3.set_ylim(0, max(atendidos) + 5)
-            
-            # Gráfico 4: Comparación atendidos vs abandonos
-            ax4.plot(tiempos[:frame+1], atendidos[:frame+1], 'g-', label='Atendidos', linewidth=2)
-            ax4.plot(tiempos[:frame+1], abandonos[:frame+1], 'r-', label='Abandonos', linewidth=2)
-            ax4.set_title('Atendidos vs Abandonos')
-            ax4.set_xlabel('Hora del día')
-            ax4.set_ylabel('Cantidad')
-            ax4.legend()
-            ax4.grid(True)
-            ax4.set_xlim(8, 12)
-            if atendidos or abandonos:
-                ax4.set_ylim(0, max(max(atendidos) if atendidos else 0, max(abandonos) if abandonos else 0) + 5)
-            
-            plt.tight_layout()
-        
-        # Crear animación
-        frames = len(self.historial_animacion)
-        interval = max(50, 500 // velocidad)  # Ajustar velocidad
-        
-        anim = animation.FuncAnimation(fig, animate, frames=frames, interval=interval, repeat=True)
+        """Crea una animación del proceso simulado (ver visualizacion.crear_animacion)"""
+        import visualizacion
+        return visualizacion.crear_animacion(self, velocidad, guardar_archivo)
+    
+    def crear_video_avi(self, velocidades=[1, 2, 5], mostrar_menu=True, procesos=None):
+        """Crea videos AVI con diferentes velocidades (ver visualizacion.crear_video_avi)"""
+        import visualizacion
+        return visualizacion.crear_video_avi(self, velocidades, mostrar_menu, procesos)
+
+def parametros_simulador(parametros):
+    """Devuelve lo mismo que SimuladorAtencionPublico(**parametros).parametros() sin construir el simulador"""
+    valores = {nombre: argumento.default
+               for nombre, argumento in inspect.signature(SimuladorAtencionPublico).parameters.items()}
+    valores.update(parametros)
+    return {
+        'num_boxes': valores['num_boxes'],
+        'asignacion_multiple': valores['asignacion_multiple'],
+        'antitetico': valores['antitetico'],
+        'hora_apertura': 8 * 3600,
+        'hora_cierre': valores['hora_cierre'],
+        'prob_ingreso': valores['prob_ingreso'],
+        'tiempo_max_espera': valores['tiempo_max_espera'],
+        'media_atencion': valores['media_atencion'],
+        'desvio_atencion': valores['desvio_atencion'],
+        'costo_box': valores['costo_box'],
+        'perdida_cliente': valores['perdida_cliente'],
+    }
+
+# Nombres que viven en visualizacion.py; se siguen pudiendo usar como MyS.<nombre>
+NOMBRES_VISUALIZACION = ('RenderizadorSimulacion', 'rotulo_velocidad', 'cuadros_con_rotulo', 'codificar_video')
+
+def __getattr__(nombre):
+    """Importa la visualización (matplotlib y Pillow) recién cuando se pide uno de sus nombres"""
+    if nombre in NOMBRES_VISUALIZACION:
+        import visualizacion
+        return getattr(visualizacion, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+def cuantil_t(probabilidad, grados_libertad):
+    """Cuantil de la distribución t de Student (expansión de Cornish-Fisher, exacta para 1 y 2 g.l.)"""
+    if grados_libertad == 1:
+        return math.tan(math.pi * (probabilidad - 0.5))
+    if grados_libertad == 2:
+        return (2 * probabilidad - 1) / math.sqrt(2 * probabilidad * (1 - probabilidad))
+    
+    z = NormalDist().inv_cdf(probabilidad)
+    v = grados_libertad
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / v + g2 / v**2 + g3 / v**3 + g4 / v**4
+
+def intervalo_confianza(valores, confianza=0.95):
+    """Devuelve (media, semiancho) del intervalo de confianza t para la media"""
+    valores = np.asarray(valores, dtype=float)
+    n = len(valores)
+    media = float(np.mean(valores)) if n else float('nan')
+    if n < 2:
+        return media, float('inf')
+    semiancho = cuantil_t(0.5 + confianza / 2, n - 1) * float(np.std(valores, ddof=1)) / math.sqrt(n)
+    return media, semiancho
+
+def simular_replica(parametros, semilla, motor='eventos', almacen=None):
+    """Ejecuta una replicación sin salida por pantalla y devuelve el simulador terminado"""
+    simulador = SimuladorAtencionPublico(**parametros, motor=motor, semilla=semilla, guardar_traza=False,
+                                         almacen=almacen)
+    simulador.simular(mostrar_progreso=False, imprimir=False)
+    return simulador
+
+def simular_rama(instantanea, cambios):
+    """Continúa una instantánea con otros parámetros hasta el fin de la jornada y devuelve el reporte"""
+    simulador = pickle.loads(instantanea)
+    simulador.configurar(**cambios)
+    simulador.simular(mostrar_progreso=False, imprimir=False)
+    return simulador.generar_reporte(imprimir=False)
+
+def simular_ramas(simulador, variantes, procesos=None):
+    """Simula desde el estado actual del simulador una rama por cada diccionario de cambios en variantes.
+
+    El prefijo ya simulado se comparte: cada proceso trabajador recibe la
+    misma instantánea serializada y solo simula lo que resta de la jornada.
+    Devuelve los reportes en el orden de las variantes.
+    """
+    instantanea = simulador.instantanea()
+    procesos = min(len(variantes), procesos or os.cpu_count() or 1)
+    if procesos <= 1:
+        return [simular_rama(instantanea, cambios) for cambios in variantes]
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(simular_rama, itertools.repeat(instantanea, len(variantes)), variantes))
+
+def reproducir_traza(bloques, num_boxes=1, motor='eventos', **parametros):
+    """Reproduce una traza de varios días, uno tras otro, en una sola pasada por los bloques.
+
+    Cada día empieza vacío con sus llegadas y atenciones registradas (ver
+    dias_de_traza); genera el reporte de cada día con la fecha, las llegadas
+    descartadas por estar fuera de horario y las que se corrieron un segundo.
+    Los bloques pueden venir de leer_traza_csv o leer_traza_binaria.
+    """
+    plantilla = SimuladorAtencionPublico(num_boxes, **parametros)
+    for dia, llegadas, atenciones, fuera_de_horario in dias_de_traza(bloques, plantilla.hora_apertura,
+                                                                      plantilla.hora_cierre):
+        simulador = SimuladorAtencionPublico(num_boxes, motor=motor, guardar_traza=False,
+                                             traza=[(llegadas, atenciones)], **parametros)
+        simulador.simular(mostrar_progreso=False, imprimir=False)
+        reporte = simulador.generar_reporte(imprimir=False)
+        reporte['fecha'] = (EPOCA_TRAZA + timedelta(days=dia)).date().isoformat()
+        reporte['fuera_de_horario'] = fuera_de_horario
+        reporte['llegadas_corridas'] = simulador.flujo.llegadas_corridas
+        yield reporte
+
+def resultado_replica(parametros, semilla, motor='eventos', almacen=None, cache=None):
+    """Devuelve (reporte, estadísticas de espera, estadísticas de atención) de una replicación.
+
+    Con una caché se reutiliza el resultado si ya se simuló con los mismos
+    parámetros y semilla; no se usa si hay que guardar la traza en un almacén.
+    """
+    clave = None
+    if cache is not None and almacen is None:
+        clave = cache.clave(parametros_simulador(parametros), semilla, motor)
+        resultado = cache.obtener(clave) if clave is not None else None
+        if resultado is not None:
+            return resultado
+    simulador = simular_replica(parametros, semilla, motor, almacen)
+    resultado = (simulador.generar_reporte(imprimir=False), simulador.estadisticas_espera,
+                 simulador.estadisticas_atencion)
+    if clave is not None:
+        cache.guardar(clave, resultado)
+    return resultado
+
+def simular_lote_replicas(parametros, semillas, motor='eventos', antiteticas=False, directorio=None,
+                          configuracion=0, inicio=0, cache=None):
+    """Ejecuta un lote de replicaciones en un proceso trabajador.
+
+    Devuelve los reportes y las estadísticas de espera y atención del lote combinadas.
+    Con antiteticas=True cada semilla se corre también en modo antitético y el
+    reporte de la réplica es el promedio del par. Con un directorio, los clientes
+    y la serie de cada réplica se guardan ahí con sus columnas configuracion,
+    replica y antitetica (numeradas desde `inicio`). Con una CacheResultados
+    solo se simulan las réplicas que no estén guardadas.
+    """
+    reportes = []
+    espera = EstadisticaEnLinea()
+    atencion = EstadisticaEnLinea()
+    almacen = None
+    if directorio is not None:
+        almacen = AlmacenResultados(directorio, configuracion=configuracion, replica=inicio, antitetica=0)
+    for k, semilla in enumerate(semillas):
+        variantes = (False, True) if antiteticas else (False,)
+        reportes_par = []
+        for antitetico in variantes:
+            if almacen is not None:
+                almacen.constantes.update(replica=inicio + k, antitetica=int(antitetico))
+            reporte, espera_replica, atencion_replica = resultado_replica(
+                dict(parametros, antitetico=antitetico), semilla, motor, almacen, cache)
+            reportes_par.append(reporte)
+            espera.combinar(espera_replica)
+            atencion.combinar(atencion_replica)
+        if antiteticas:
+            reportes.append({m: (reportes_par[0][m] + reportes_par[1][m]) / 2 for m in METRICAS_REPLICACION})
+        else:
+            reportes.append(reportes_par[0])
+    if almacen is not None:
+        almacen.cerrar()
+    return reportes, espera, atencion
+
+def resumir_replicas(parametros, valores, estadisticas_lotes, confianza=0.95):
+    """Arma el resultado de una configuración: media e intervalo de cada métrica y tiempos combinados.
+
+    valores tiene un arreglo por métrica con una entrada por réplica y
+    estadisticas_lotes los pares (espera, atención) de cada lote, en orden.
+    """
+    resultado = dict(parametros, replicas=len(next(iter(valores.values()))))
+    for metrica, muestra in valores.items():
+        media, semiancho = intervalo_confianza(muestra, confianza)
+        resultado[metrica] = media
+        resultado[f'{metrica}_ic'] = (media - semiancho, media + semiancho)
+    
+    # Tiempos de espera y atención de todas las réplicas juntas
+    espera = EstadisticaEnLinea()
+    atencion = EstadisticaEnLinea()
+    for espera_lote, atencion_lote in estadisticas_lotes:
+        espera.combinar(espera_lote)
+        atencion.combinar(atencion_lote)
+    resultado['espera'] = espera.resumen()
+    resultado['atencion'] = atencion.resumen()
+    return resultado
+
+def ejecutar_lotes(tareas, funcion, argumentos, procesos, registrar):
+    """Ejecuta funcion(*argumentos(*tarea)) para cada tarea y pasa el resultado a registrar(*tarea, resultado).
+
+    Con más de un proceso las tareas se reparten en un pool con una ventana
+    acotada de tareas en vuelo (el doble de procesos), así no se arman todos los
+    argumentos de entrada, y los resultados se registran a medida que llegan.
+    """
+    if procesos == 1:
+        for tarea in tareas:
+            registrar(*tarea, funcion(*argumentos(*tarea)))
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        pendientes = iter(tareas)
+        en_vuelo = {}
+        for tarea in pendientes:
+            en_vuelo[pool.submit(funcion, *argumentos(*tarea))] = tarea
+            if len(en_vuelo) >= 2 * procesos:
+                break
+        while en_vuelo:
+            listas, _ = wait(en_vuelo, return_when=FIRST_COMPLETED)
+            for futuro in listas:
+                tarea = en_vuelo.pop(futuro)
+                registrar(*tarea, futuro.result())
+                siguiente = next(pendientes, None)
+                if siguiente is not None:
+                    en_vuelo[pool.submit(funcion, *argumentos(*siguiente))] = siguiente
+
+def ejecutar_replicaciones(configuraciones, replicas=30, semilla=None, procesos=None,
+                           confianza=0.95, motor='eventos', tamano_lote=8, mostrar_progreso=True,
+                           numeros_comunes=False, antiteticas=False, directorio_resultados=None, cache=None):
+    """Ejecuta replicaciones de cada configuración en un pool de procesos.
+
+    Cada configuración es un número de boxes o un diccionario de parámetros del
+    simulador. Las semillas salen de SeedSequence.spawn por configuración y por
+    réplica, así que los resultados no dependen de la cantidad de procesos.
+
+    Con numeros_comunes=True la réplica r de todas las configuraciones usa la
+    misma semilla (mismas llegadas y mismas duraciones por cliente) y se
+    agregan intervalos de la diferencia de costo pareada contra la mejor
+    configuración. Con antiteticas=True cada réplica es un par antitético.
+
+    Con directorio_resultados se guardan ahí (ver AlmacenResultados) el reporte
+    de cada réplica en la tabla 'replicas', a medida que terminan los lotes, y
+    los clientes y la serie temporal de cada réplica. Con una CacheResultados
+    las réplicas ya simuladas se leen de la caché; sin semilla no se usa, porque
+    las semillas derivadas de entropía aleatoria no se vuelven a repetir.
+    """
+    configuraciones = [c if isinstance(c, dict) else {'num_boxes': c} for c in configuraciones]
+    procesos = procesos or os.cpu_count() or 1
+    if semilla is None:
+        cache = None
+    
+    if numeros_comunes:
+        semillas = [np.random.SeedSequence(semilla).spawn(replicas)] * len(configuraciones)
+    else:
+        semillas = [s.spawn(replicas) for s in np.random.SeedSequence(semilla).spawn(len(configuraciones))]
+    valores = [{m: np.full(replicas, np.nan) for m in METRICAS_REPLICACION} for _ in configuraciones]
+    
+    # Tareas: lotes de réplicas consecutivas de una misma configuración
+    tareas = [(i, inicio) for i in range(len(configuraciones))
+              for inicio in range(0, replicas, tamano_lote)]
+    
+    # Estadísticas de cada lote; se combinan al final en orden para que sea reproducible
+    estadisticas_lotes = {}
+    almacen = AlmacenResultados(directorio_resultados) if directorio_resultados is not None else None
+    tipos_replicas = dict({'configuracion': np.int64, 'replica': np.int64},
+                          **{metrica: np.float64 for metrica in METRICAS_REPLICACION})
+    
+    def lote(i, inicio):
+        return (configuraciones[i], semillas[i][inicio:inicio + tamano_lote], motor, antiteticas,
+                directorio_resultados, i, inicio, cache)
+    
+    def registrar(i, inicio, resultado_lote):
+        reportes, espera, atencion = resultado_lote
+        for k, reporte in enumerate(reportes):
+            for metrica in METRICAS_REPLICACION:
+                valores[i][metrica][inicio + k] = reporte[metrica]
+        estadisticas_lotes[i, inicio] = (espera, atencion)
+        if almacen is not None:
+            fin = inicio + len(reportes)
+            almacen.tabla('replicas', tipos_replicas).agregar_columnas(
+                configuracion=np.full(len(reportes), i), replica=np.arange(inicio, fin),
+                **{metrica: valores[i][metrica][inicio:fin] for metrica in METRICAS_REPLICACION})
+    
+    completadas = 0
+    
+    def registrar_con_progreso(i, inicio, resultado_lote):
+        nonlocal completadas
+        registrar(i, inicio, resultado_lote)
+        completadas += 1
+        if mostrar_progreso:
+            print(f"\rLotes completados: {completadas}/{len(tareas)}", end="", flush=True)
+    
+    ejecutar_lotes(tareas, simular_lote_replicas, lote, procesos, registrar_con_progreso)
+    if mostrar_progreso and tareas:
+        print()
+    if almacen is not None:
+        almacen.cerrar()
+    
+    resultados = [resumir_replicas(parametros, valores_config,
+                                   [estadisticas_lotes[i, inicio] for inicio in range(0, replicas, tamano_lote)],
+                                   confianza)
+                  for i, (parametros, valores_config) in enumerate(zip(configuraciones, valores))]
+    
+    if numeros_comunes:
+        # Diferencias pareadas réplica a réplica contra la configuración de menor costo medio
+        mejor = min(range(len(resultados)), key=lambda i: resultados[i]['costo_total'])
+        for i, resultado in enumerate(resultados):
+            diferencias = valores[i]['costo_total'] - valores[mejor]['costo_total']
+            media, semiancho = intervalo_confianza(diferencias, confianza) if i != mejor else (0.0, 0.0)
+            resultado['diferencia_con_mejor'] = media
+            resultado['diferencia_con_mejor_ic'] = (media - semiancho, media + semiancho)
+    return resultados
+
+# Métricas de régimen estacionario: cada una es un cociente de sumas por lote (numerador, denominador)
+METRICAS_ESTACIONARIO = ('prob_abandono', 'espera_media')
+
+def truncamiento_mser(valores):
+    """Cantidad de lotes iniciales a descartar según MSER (Marginal Standard Error Rule).
+
+    Elige d en [0, n/2] que minimiza la suma de cuadrados de los lotes
+    restantes respecto de su media dividida por (n - d)²; aplicado a promedios
+    de 5 observaciones es MSER-5.
+    """
+    y = np.asarray(valores, dtype=float)
+    n = len(y)
+    if n < 4:
+        return 0
+    # Sumas de los sufijos y[d:] para todos los d a la vez
+    suma = np.cumsum(y[::-1])[::-1]
+    suma_cuadrados = np.cumsum((y * y)[::-1])[::-1]
+    restantes = np.arange(n, 0, -1)
+    mser = (suma_cuadrados - suma * suma / restantes) / restantes**2
+    return int(np.argmin(mser[:n // 2 + 1]))
+
+def intervalo_cociente(numeradores, denominadores, confianza=0.95):
+    """Estimación e intervalo de sum(numeradores) / sum(denominadores) por medias de lotes (método delta)"""
+    a = np.asarray(numeradores, dtype=float)
+    n = np.asarray(denominadores, dtype=float)
+    if n.sum() <= 0:
+        return float('nan'), float('nan')
+    cociente = a.sum() / n.sum()
+    k = len(a)
+    if k < 2:
+        return cociente, float('nan')
+    residuos = a - cociente * n
+    error = math.sqrt(residuos.var(ddof=1) / k) / n.mean()
+    return cociente, cuantil_t(0.5 + confianza / 2, k - 1) * error
+
+def simular_estado_estacionario(num_boxes=1, metrica='prob_abandono', precision_relativa=0.05, confianza=0.95,
+                                semilla=None, duracion_observacion=60, max_lotes=256, lotes_intervalo=20,
+                                horizonte_maximo=365 * 24 * 3600, mostrar_progreso=True, **parametros):
+    """Estima métricas de régimen estacionario con una única trayectoria larga.
+
+    En lugar de muchas jornadas cortas que empiezan vacías y terminan con el
+    cierre, el motor por eventos avanza sin horario de cierre de a
+    `duracion_observacion` segundos. Cada 5 observaciones forman un lote; cuando
+    hay 2 * max_lotes lotes se suman de a pares, así la memoria es constante.
+    El calentamiento se detecta con MSER-5 sobre los lotes y lo que sigue se
+    agrupa en `lotes_intervalo` medias de lotes para el intervalo de confianza.
+    La corrida termina cuando el semiancho relativo de `metrica` (una de
+    METRICAS_ESTACIONARIO) llega a `precision_relativa` o se alcanza el
+    horizonte máximo. Los demás parámetros se pasan al simulador.
+    """
+    if metrica not in METRICAS_ESTACIONARIO:
+        raise ValueError(f"Métrica desconocida: {metrica!r} (opciones: {', '.join(METRICAS_ESTACIONARIO)})")
+    simulador = SimuladorAtencionPublico(num_boxes, motor='eventos', semilla=semilla, guardar_traza=False,
+                                         intervalo_muestreo=horizonte_maximo,
+                                         hora_cierre=8 * 3600 + horizonte_maximo, **parametros)
+    simulador.iniciar_calendario()
+    
+    # Sumas por lote: abandonos, clientes resueltos (abandonaron o empezaron a ser atendidos),
+    # suma de esperas y clientes atendidos
+    lotes = np.zeros((2 * max_lotes, 4))
+    cantidad = 0
+    observaciones_por_lote = 5
+    observaciones = 0
+    anterior = np.zeros(4)
+    
+    def acumulados():
+        espera = simulador.estadisticas_espera
+        return np.array([simulador.clientes_abandonaron, simulador.clientes_abandonaron + espera.n,
+                         espera.media * espera.n, espera.n])
+    
+    def estimar():
+        # Recorte MSER-5 sobre el cociente de cada lote (el de la métrica pedida)
+        columnas = (0, 1) if metrica == 'prob_abandono' else (2, 3)
+        usados = lotes[:cantidad]
+        valores = usados[:, columnas[0]] / np.maximum(usados[:, columnas[1]], 1)
+        descartados = truncamiento_mser(valores)
+        grupos = np.array([g.sum(axis=0) for g in np.array_split(usados[descartados:],
+                                                                 max(1, min(lotes_intervalo, cantidad - descartados)))])
+        estimaciones = {'prob_abandono': intervalo_cociente(grupos[:, 0], grupos[:, 1], confianza),
+                        'espera_media': intervalo_cociente(grupos[:, 2], grupos[:, 3], confianza)}
+        return descartados, estimaciones
+    
+    descartados, estimaciones = 0, {}
+    convergio = False
+    tiempo = 0
+    proximo_aviso = 0
+    while tiempo < horizonte_maximo:
+        tiempo += duracion_observacion
+        simulador.avanzar_hasta(tiempo)
+        actuales = acumulados()
+        lotes[cantidad] += actuales - anterior
+        anterior = actuales
+        observaciones += 1
+        if observaciones < observaciones_por_lote:
+            continue
+        observaciones = 0
+        cantidad += 1
+        if cantidad == len(lotes):
+            # Memoria acotada: sumar lotes de a pares y duplicar su tamaño
+            lotes[:max_lotes] = lotes.reshape(max_lotes, 2, 4).sum(axis=1)
+            lotes[max_lotes:] = 0
+            cantidad = max_lotes
+            observaciones_por_lote *= 2
         
-        if guardar_archivo:
-            # Intentar guardar como AVI primero
+        if cantidad >= 2 * lotes_intervalo:
+            descartados, estimaciones = estimar()
+            estimacion, semiancho = estimaciones[metrica]
+            if mostrar_progreso and tiempo >= proximo_aviso:
+                proximo_aviso += 24 * 3600  # Una línea de progreso por día simulado
+                print(f"\rTiempo simulado: {tiempo / 3600:,.0f} h | {metrica}: {estimacion:.4g} ± {semiancho:.2g}",
+                      end="", flush=True)
+            if (cantidad - descartados >= lotes_intervalo and estimacion > 0
+                    and semiancho <= precision_relativa * estimacion):
+                convergio = True
+                break
+    if mostrar_progreso:
+        print()
+    if not estimaciones:
+        descartados, estimaciones = estimar()
+    
+    duracion_lote = observaciones_por_lote * duracion_observacion
+    resultado = {
+        'num_boxes': num_boxes,
+        'metrica': metrica,
+        'convergio': convergio,
+        'tiempo_simulado': tiempo,
+        'calentamiento': descartados * duracion_lote,
+        'clientes_ingresados': simulador.clientes_ingresados,
+    }
+    for nombre, (estimacion, semiancho) in estimaciones.items():
+        resultado[nombre] = float(estimacion)
+        resultado[f'{nombre}_ic'] = (float(estimacion - semiancho), float(estimacion + semiancho))
+    
+    if mostrar_progreso:
+        print(f"Régimen estacionario con {num_boxes} boxes "
+              f"({'precisión alcanzada' if convergio else 'se alcanzó el horizonte máximo'})")
+        print(f"Calentamiento descartado: {resultado['calentamiento'] / 3600:.2f} h de "
+              f"{tiempo / 3600:,.1f} h simuladas")
+        print(f"Probabilidad de abandono: {resultado['prob_abandono']:.4f} "
+              f"({resultado['prob_abandono_ic'][0]:.4f} - {resultado['prob_abandono_ic'][1]:.4f})")
+        print(f"Espera media: {resultado['espera_media'] / 60:.2f} minutos "
+              f"({resultado['espera_media_ic'][0] / 60:.2f} - {resultado['espera_media_ic'][1] / 60:.2f})")
+    return resultado
+
+def log_suma_exp(valores):
+    """log(sum(exp(v))) sin desbordes"""
+    maximo = max(valores)
+    return maximo + math.log(sum(math.exp(v - maximo) for v in valores))
+
+def aproximar_erlang_a(num_boxes=1, prob_ingreso=1/144, tiempo_max_espera=30 * 60, media_atencion=10 * 60,
+                       desvio_atencion=5 * 60, costo_box=1000, perdida_cliente=10000, hora_cierre=12 * 3600,
+                       hora_apertura=8 * 3600, tiempo_min_atencion=60):
+    """Estima abandonos y costo de una jornada sin simular (M/G/c con paciencia determinística).
+
+    Régimen estacionario M/M/c+D: la espera virtual V tiene densidad
+    λ·π(c-1)·exp(-θx) hasta la paciencia D y cae como exp(-cμx) después, con
+    θ = cμ - λ; abandona quien llega con V > D. La variabilidad del servicio
+    (normal acotada al mínimo) corrige θ y cμ dividiéndolos por (1 + cs²) / 2.
+    Los abandonos del día son λ(T - D)·P(V > D) más la cola al cierre,
+    λ·E[min(V, D)], que el simulador cuenta como no atendidos.
+
+    Cerca de la saturación la jornada no llega al régimen estacionario; con
+    sobrecarga se mezcla con el modelo fluido (los abandonos son las llegadas
+    que exceden la capacidad, (λ - cμ)T). Los valores _min y _max acotan el
+    error de la aproximación (calibrados contra simulación en un hipercubo
+    latino de parámetros) y sirven para descartar configuraciones dominadas.
+    """
+    c = num_boxes
+    lam = prob_ingreso
+    D = tiempo_max_espera
+    T = hora_cierre - hora_apertura
+    
+    # Momentos del tiempo de atención max(N(media, desvio), mínimo)
+    if desvio_atencion > 0:
+        normal = NormalDist()
+        a = (tiempo_min_atencion - media_atencion) / desvio_atencion
+        F, densidad = normal.cdf(a), normal.pdf(a)
+        m1 = tiempo_min_atencion * F + media_atencion * (1 - F) + desvio_atencion * densidad
+        m2 = (tiempo_min_atencion**2 * F + (media_atencion**2 + desvio_atencion**2) * (1 - F)
+              + desvio_atencion * (media_atencion + tiempo_min_atencion) * densidad)
+    else:
+        m1 = max(media_atencion, tiempo_min_atencion)
+        m2 = m1 * m1
+    mu = 1 / m1
+    kappa = (1 + max(m2 - m1 * m1, 0.0) / (m1 * m1)) / 2
+    
+    if lam <= 0 or c <= 0:
+        abandonos = lam * T if c <= 0 else 0.0
+        return {'prob_abandono': 1.0 if c <= 0 else 0.0, 'espera_media': 0.0, 'ocupacion': 0.0,
+                'abandonos': abandonos, 'abandonos_min': abandonos, 'abandonos_max': abandonos,
+                **{f'costo_total{sufijo}': c * costo_box + perdida_cliente * abandonos
+                   for sufijo in ('', '_min', '_max')}}
+    
+    # Probabilidades relativas a π(c-1), en logaritmos para que no desborden con muchos boxes
+    theta = (c * mu - lam) / kappa
+    salida = c * mu / kappa
+    logs = [math.lgamma(c) - math.lgamma(k + 1) + (c - 1 - k) * math.log(mu / lam) for k in range(c)]
+    t = theta * D
+    if abs(t) < 1e-8:
+        log_masa, log_momento = math.log(D), math.log(D * D / 2)
+    elif t > 0:
+        log_masa = math.log(-math.expm1(-t)) - math.log(theta)
+        log_momento = math.log(1 - math.exp(-t) * (1 + t)) - 2 * math.log(theta)
+    else:
+        # Sobrecarga: la densidad crece hasta D; se factoriza exp(-t) para no desbordar
+        log_masa = -t + math.log(-math.expm1(t)) - math.log(-theta)
+        log_momento = -t + math.log(-t - 1 + math.exp(t)) - 2 * math.log(-theta)
+    log_cola = math.log(lam) - t - math.log(salida)
+    log_total = log_suma_exp(logs + [math.log(lam) + log_masa, log_cola])
+    prob_abandono = math.exp(log_cola - log_total)
+    espera_media = math.exp(math.log(lam) + log_momento - log_total) + D * prob_abandono  # E[min(V, D)]
+    estacionario = lam * max(T - D, 0) * prob_abandono + lam * espera_media
+    
+    # Modelo fluido: con sobrecarga clara pesa más que el estacionario
+    fluido = max(lam - c * mu, 0.0) * T
+    peso = min(1.0, fluido / (2 * math.sqrt(lam * T)))
+    abandonos = peso * fluido + (1 - peso) * estacionario
+    abandonos_min = max(0.0, 0.75 * min(fluido, estacionario) - 1)
+    abandonos_max = 1.25 * max(fluido, estacionario) + 1
+    return {
+        'prob_abandono': prob_abandono,
+        'espera_media': espera_media,
+        'ocupacion': lam / (c * mu),
+        'abandonos': abandonos,
+        'abandonos_min': abandonos_min,
+        'abandonos_max': abandonos_max,
+        'costo_total': c * costo_box + perdida_cliente * abandonos,
+        'costo_total_min': c * costo_box + perdida_cliente * abandonos_min,
+        'costo_total_max': c * costo_box + perdida_cliente * abandonos_max,
+    }
+
+def descartar_dominadas(puntos):
+    """Separa con aproximar_erlang_a los puntos claramente dominados por otro con distinta cantidad de boxes.
+
+    Compara solo puntos que tienen los mismos parámetros salvo num_boxes: se
+    descarta uno si su costo mínimo estimado supera el costo máximo estimado de
+    otro. Devuelve (índices que hay que simular, aproximación de cada punto).
+    """
+    aproximaciones = [aproximar_erlang_a(**punto) for punto in puntos]
+    grupos = {}
+    for i, punto in enumerate(puntos):
+        grupos.setdefault(clave_punto({k: v for k, v in punto.items() if k != 'num_boxes'}), []).append(i)
+    conservados = []
+    for indices in grupos.values():
+        mejor_cota = min(aproximaciones[i]['costo_total_max'] for i in indices)
+        conservados += [i for i in indices if aproximaciones[i]['costo_total_min'] <= mejor_cota]
+    return sorted(conservados), aproximaciones
+
+def disenar_grilla(valores):
+    """Diseño factorial completo: un punto por cada combinación de los valores de cada parámetro.
+
+    valores es un diccionario nombre -> lista de valores, por ejemplo
+    {'num_boxes': [2, 3, 4], 'prob_ingreso': [1/180, 1/144, 1/120]}.
+    """
+    validar_parametros_barrido(valores)
+    nombres = list(valores)
+    return [dict(zip(nombres, combinacion)) for combinacion in itertools.product(*valores.values())]
+
+def disenar_hipercubo_latino(rangos, puntos, semilla=None):
+    """Diseño de hipercubo latino: `puntos` puntos que cubren cada rango en estratos de igual ancho.
+
+    rangos es un diccionario nombre -> (mínimo, máximo). Cada parámetro cae una
+    sola vez en cada uno de los `puntos` estratos de su rango; los enteros
+    (PARAMETROS_ENTEROS) se sortean uniformes entre mínimo y máximo inclusive.
+    """
+    validar_parametros_barrido(rangos)
+    rng = np.random.default_rng(semilla)
+    columnas = {}
+    for nombre, (minimo, maximo) in rangos.items():
+        u = (rng.permutation(puntos) + rng.random(puntos)) / puntos
+        if nombre in PARAMETROS_ENTEROS:
+            columnas[nombre] = [int(v) for v in np.minimum(np.floor(minimo + u * (maximo - minimo + 1)), maximo)]
+        else:
+            columnas[nombre] = [float(v) for v in minimo + u * (maximo - minimo)]
+    return [{nombre: columnas[nombre][i] for nombre in rangos} for i in range(puntos)]
+
+def validar_parametros_barrido(parametros):
+    """Verifica que solo se barran parámetros del simulador"""
+    desconocidos = [nombre for nombre in parametros if nombre not in PARAMETROS_BARRIDO]
+    if desconocidos:
+        raise ValueError(f"Parámetros desconocidos: {', '.join(desconocidos)} "
+                         f"(opciones: {', '.join(PARAMETROS_BARRIDO)})")
+
+def clave_punto(punto):
+    """Identifica un punto del diseño en el archivo de avance"""
+    return json.dumps(punto, sort_keys=True)
+
+def leer_avance(archivo):
+    """Lee los puntos ya terminados de un archivo JSONL de avance (ignora una última línea cortada)"""
+    terminados = {}
+    if archivo is None or not os.path.exists(archivo):
+        return terminados
+    with open(archivo, encoding='utf-8') as f:
+        for linea in f:
             try:
-                print("Guardando animación como 'simulacion_atencion.avi'...")
-                anim.save('simulacion_atencion.avi', writer='ffmpeg', fps=10, 
-                         extra_args=['-vcodec', 'libx264'])
-                print("Animación AVI guardada exitosamente!")
-            except Exception as e:
-                print(f"No se pudo guardar como AVI (requiere ffmpeg): {e}")
-                print("Guardando como GIF alternativo...")
-                anim.save('simulacion_atencion.gif', writer='pillow', fps=10)
-                print("Animación GIF guardada exitosamente!")
-        
-        plt.show()
-        return anim
-    
-    def crear_video_avi(self, velocidades=[1, 2, 5], mostrar_menu=True):
-        """Crea videos AVI con diferentes velocidades"""
-        if not self.historial_animacion:
-            print("No hay datos de animación disponibles.")
+                registro = json.loads(linea)
+            except json.JSONDecodeError:
+                continue  # Línea a medio escribir cuando se cortó el barrido
+            terminados[clave_punto(registro['punto'])] = registro
+    return terminados
+
+def barrer_parametros(puntos, replicas=10, semilla=None, procesos=None, confianza=0.95, motor='eventos',
+                      tamano_lote=5, numeros_comunes=True, archivo_avance=None, cache=None, mostrar_progreso=True,
+                      podar=False):
+    """Simula cada punto de un diseño (ver disenar_grilla y disenar_hipercubo_latino) con replicaciones.
+
+    Los lotes de réplicas de todos los puntos se reparten en un pool de procesos
+    con una ventana acotada de tareas en vuelo. Cada punto terminado se agrega
+    como una línea JSON al archivo de avance; si el barrido se corta, al volver a
+    llamarlo con el mismo archivo solo se simulan los puntos que faltan. La
+    réplica r del punto i usa la semilla (entropia, i, r), o (entropia, r) con
+    números comunes, así que retomar no cambia los resultados. Sin semilla se
+    reutiliza la entropía guardada en el archivo de avance; si tampoco hay
+    archivo de avance, no se usa la caché.
+    Con podar=True los puntos claramente dominados según aproximar_erlang_a (ver
+    descartar_dominadas) no se simulan: su resultado es la aproximación, con
+    'aproximado': True.
+    Devuelve el resultado de cada punto (ver resumir_replicas), en el orden del diseño.
+    """
+    terminados = leer_avance(archivo_avance)
+    if archivo_avance is not None and os.path.exists(archivo_avance):
+        with open(archivo_avance, 'rb+') as f:
+            # Cerrar una línea cortada para que los puntos nuevos empiecen en su propia línea
+            if f.seek(0, os.SEEK_END):
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+    if semilla is None and terminados:
+        entropia = next(iter(terminados.values()))['entropia']
+    else:
+        entropia = np.random.SeedSequence(semilla).entropy
+    if semilla is None and archivo_avance is None:
+        cache = None  # La entropía aleatoria no queda guardada: sus resultados no se podrían reutilizar
+    procesos = procesos or os.cpu_count() or 1
+    
+    pendientes_puntos = [i for i, punto in enumerate(puntos) if clave_punto(punto) not in terminados]
+    if mostrar_progreso:
+        print(f"Barrido: {len(puntos)} puntos, {len(puntos) - len(pendientes_puntos)} ya terminados")
+    
+    def guardar_punto(i, resultado):
+        linea = json.dumps({'punto': puntos[i], 'entropia': entropia, 'resultado': resultado}, default=float)
+        terminados[clave_punto(puntos[i])] = json.loads(linea)  # Mismos tipos que al retomar desde el archivo
+        if archivo_avance is not None:
+            with open(archivo_avance, 'a', encoding='utf-8') as f:
+                f.write(linea + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+    
+    if podar:
+        conservados, aproximaciones = descartar_dominadas(puntos)
+        conservados = set(conservados)
+        for i in [i for i in pendientes_puntos if i not in conservados]:
+            aproximacion = aproximaciones[i]
+            guardar_punto(i, dict(puntos[i], aproximado=True, replicas=0,
+                                  costo_total=aproximacion['costo_total'],
+                                  clientes_abandonaron=aproximacion['abandonos'],
+                                  costo_total_ic=(aproximacion['costo_total_min'], aproximacion['costo_total_max'])))
+        if mostrar_progreso:
+            print(f"Aproximación Erlang-A: {len(pendientes_puntos) - len(conservados & set(pendientes_puntos))} "
+                  f"puntos dominados no se simulan")
+        pendientes_puntos = [i for i in pendientes_puntos if i in conservados]
+    
+    tareas = [(i, inicio) for i in pendientes_puntos for inicio in range(0, replicas, tamano_lote)]
+    lotes_restantes = {i: len(range(0, replicas, tamano_lote)) for i in pendientes_puntos}
+    valores = {}
+    estadisticas_lotes = {}
+    
+    def lote(i, inicio):
+        semillas = [np.random.SeedSequence(entropia, spawn_key=(r,) if numeros_comunes else (i, r))
+                    for r in range(inicio, min(inicio + tamano_lote, replicas))]
+        return dict(puntos[i]), semillas, motor, False, None, i, inicio, cache
+    
+    def registrar(i, inicio, resultado_lote):
+        reportes, espera, atencion = resultado_lote
+        valores_punto = valores.setdefault(i, {m: np.full(replicas, np.nan) for m in METRICAS_REPLICACION})
+        for k, reporte in enumerate(reportes):
+            for metrica in METRICAS_REPLICACION:
+                valores_punto[metrica][inicio + k] = reporte[metrica]
+        estadisticas_lotes[i, inicio] = (espera, atencion)
+        lotes_restantes[i] -= 1
+        if lotes_restantes[i]:
             return
         
-        # Mostrar datos de la simulación antes de generar videos
-        print("\n" + "=" * 60)
-        print("DATOS DE LA SIMULACIÓN PARA GENERACIÓN DE VIDEO")
-        print("=" * 60)
-        self.generar_reporte()
-        
-        if mostrar_menu:
-            print("\n¿Qué velocidades de video deseas generar?")
-            print("1. Velocidad normal (1x)")
-            print("2. Velocidad rápida (2x)")
-            print("3. Velocidad muy rápida (5x)")
-            print("4. Todas las velocidades")
-            print("5. Velocidades personalizadas")
-            
-            opcion = input("Selecciona una opción (1-5): ").strip()
-            
-            if opcion == '1':
-                velocidades = [1]
-            elif opcion == '2':
-                velocidades = [2]
-            elif opcion == '3':
-                velocidades = [5]
-            elif opcion == '4':
-                velocidades = [1, 2, 5]
-            elif opcion == '5':
-                vel_input = input("Ingresa velocidades separadas por comas (ej: 1,3,10): ")
-                try:
-                    velocidades = [int(v.strip()) for v in vel_input.split(',')]
-                except:
-                    print("Error en formato, usando velocidades por defecto.")
-                    velocidades = [1, 2, 5]
-        
-        for velocidad in velocidades:
-            print(f"\nGenerando video a velocidad {velocidad}x...")
-            
-            fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
-            fig.suptitle(f'Simulación Sistema de Atención - {self.num_boxes} Boxes (Velocidad {velocidad}x)', fontsize=14)
-            
-            # Preparar datos para gráficos
-            tiempos = [estado['tiempo']/3600 + 8 for estado in self.historial_animacion]
-            cola_sizes = [estado['cola_size'] for estado in self.historial_animacion]
-            boxes_ocupados = [estado['boxes_ocupados'] for estado in self.historial_animacion]
-            atendidos = [estado['clientes_atendidos'] for estado in self.historial_animacion]
-            abandonos = [estado['clientes_abandonaron'] for estado in self.historial_animacion]
-            
-            def animate(frame):
-                ax1.clear()
-                ax2.clear()
-                ax3.clear()
-                ax4.clear()
-                
-                # Gráfico 1: Tamaño de cola
-                ax1.plot(tiempos[:frame+1], cola_sizes[:frame+1], 'b-', linewidth=2)
-                ax1.set_title('Tamaño de Cola')
-                ax1.set_xlabel('Hora del día')
-                ax1.set_ylabel('Clientes en cola')
-                ax1.grid(True)
-                ax1.set_xlim(8, 12)
-                if cola_sizes:
-                    ax1.set_ylim(0, max(cola_sizes) + 2)
-                
-                # Gráfico 2: Boxes ocupados
-                ax2.plot(tiempos[:frame+1], boxes_ocupados[:frame+1], 'g-', linewidth=2)
-                ax2.set_title('Boxes Ocupados')
-                ax2.set_xlabel('Hora del día')
-                ax2.set_ylabel('Boxes en uso')
-                ax2.grid(True)
-                ax2.set_xlim(8, 12)
-                ax2.set_ylim(0, self.num_boxes + 1)
-                
-                # Gráfico 3: Clientes atendidos
-                ax3.plot(tiempos[:frame+1], atendidos[:frame+1], 'orange', linewidth=2)
-                ax3.set_title('Clientes Atendidos (Acumulado)')
-                ax3.set_xlabel('Hora del día')
-                ax3.set_ylabel('Total atendidos')
-                ax3.grid(True)
-                ax3.set_xlim(8, 12)
-                if atendidos:
-                    ax3.set_ylim(0, max(atendidos) + 5)
-                
-                # Gráfico 4: Atendidos vs abandonos
-                ax4.plot(tiempos[:frame+1], atendidos[:frame+1], 'g-', label='Atendidos', linewidth=2)
-                ax4.plot(tiempos[:frame+1], abandonos[:frame+1], 'r-', label='Abandonos', linewidth=2)
-                ax4.set_title('Atendidos vs Abandonos')
-                ax4.set_xlabel('Hora del día')
-                ax4.set_ylabel('Cantidad')
-                ax4.legend()
-                ax4.grid(True)
-                ax4.set_xlim(8, 12)
-                if atendidos or abandonos:
-                    ax4.set_ylim(0, max(max(atendidos) if atendidos else 0, max(abandonos) if abandonos else 0) + 5)
-                
-                # Agregar indicador de tiempo actual
-                tiempo_actual = tiempos[frame] if frame < len(tiempos) else tiempos[-1]
-                fig.suptitle(f'Simulación Sistema de Atención - {self.num_boxes} Boxes (Velocidad {velocidad}x) - Hora: {tiempo_actual:.2f}', fontsize=14)
-                
-                plt.tight_layout()
-            
-            frames = len(self.historial_animacion)
-            interval = max(20, 200 // velocidad)  # Ajustar intervalo según velocidad
-            fps = min(30, 10 * velocidad)  # FPS más alto para velocidades rápidas
-            
-            anim = animation.FuncAnimation(fig, animate, frames=frames, interval=interval, repeat=False)
-            
-            # Guardar video AVI
-            archivo_avi = f'simulacion_atencion_velocidad_{velocidad}x.avi'
-            try:
-                anim.save(archivo_avi, writer='ffmpeg', fps=fps, 
-                         extra_args=['-vcodec', 'libx264', '-preset', 'medium'])
-                print(f"✓ Video guardado: {archivo_avi}")
-            except Exception as e:
-                print(f"✗ Error guardando {archivo_avi}: {e}")
-                # Fallback a GIF
-                archivo_gif = f'simulacion_atencion_velocidad_{velocidad}x.gif'
-                try:
-                    anim.save(archivo_gif, writer='pillow', fps=min(10, fps))
-                    print(f"✓ GIF alternativo guardado: {archivo_gif}")
-                except Exception as e2:
-                    print(f"✗ Error guardando GIF: {e2}")
-            
-            plt.close(fig)  # Cerrar figura para liberar memoria
+        # Punto terminado: resumir y guardar en el archivo de avance
+        resultado = resumir_replicas(puntos[i], valores.pop(i),
+                                     [estadisticas_lotes.pop((i, j)) for j in range(0, replicas, tamano_lote)],
+                                     confianza)
+        guardar_punto(i, resultado)
+        if mostrar_progreso:
+            print(f"\rPuntos terminados: {len(terminados)}/{len(puntos)}", end="", flush=True)
+    
+    ejecutar_lotes(tareas, simular_lote_replicas, lote, procesos, registrar)
+    if mostrar_progreso and tareas:
+        print()
+    
+    return [terminados[clave_punto(punto)]['resultado'] for punto in puntos]
+
+def simular_replicas_vectorizado(num_boxes, replicas=10000, semilla=None, asignacion_multiple=False,
+                                 tamano_bloque=10000):
+    """Simula muchas replicaciones a la vez con operaciones de arreglos NumPy.
+
+    Avanza todas las réplicas en paralelo cliente por cliente: como la cola es
+    FIFO y la paciencia es constante, el inicio de atención de cada cliente
+    depende solo de su llegada, del primer box que se libera y del inicio del
+    cliente anterior (se asigna uno por segundo, igual que el motor por ticks).
+    Los tiempos de liberación de los boxes viven en un arreglo (réplicas, boxes).
+    Devuelve un diccionario de arreglos con una entrada por réplica.
+    """
+    plantilla = SimuladorAtencionPublico(num_boxes)
+    duracion = plantilla.duracion_simulacion
+    limite = duracion + 3600  # Máximo 1 hora extra para terminar atenciones
+    
+    rng = np.random.default_rng(semilla)
+    bloques = []
+    for inicio in range(0, replicas, tamano_bloque):
+        bloques.append(simular_bloque_vectorizado(plantilla, min(tamano_bloque, replicas - inicio),
+                                                  rng, limite, asignacion_multiple))
+    resultados = {clave: np.concatenate([b[clave] for b in bloques]) for clave in bloques[0]}
+    
+    resultados['costo_total'] = (num_boxes * plantilla.costo_box
+                                 + resultados['clientes_abandonaron'] * plantilla.perdida_cliente)
+    ingresados = resultados['clientes_ingresados']
+    resultados['tasa_atencion'] = np.where(
+        ingresados > 0, resultados['clientes_atendidos'] / np.maximum(ingresados, 1) * 100, 0)
+    return resultados
+
+def simular_bloque_vectorizado(plantilla, replicas, rng, limite, asignacion_multiple):
+    """Simula un bloque de réplicas (ver simular_replicas_vectorizado)"""
+    duracion = plantilla.duracion_simulacion
+    
+    # Llegadas: intervalos geométricos acumulados hasta cubrir la jornada en todas las réplicas
+    esperados = duracion * plantilla.prob_ingreso
+    max_clientes = int(esperados + 8 * math.sqrt(esperados) + 16)
+    while True:
+        intervalos = rng.geometric(plantilla.prob_ingreso, size=(replicas, max_clientes))
+        llegadas = np.cumsum(intervalos, axis=1) - 1
+        if llegadas[:, -1].min() >= duracion:
+            break
+        max_clientes *= 2
+    atenciones = np.maximum(rng.normal(plantilla.media_atencion, plantilla.desvio_atencion,
+                                       size=(replicas, max_clientes)), 60)
+    
+    filas = np.arange(replicas)
+    box_libre = np.zeros((replicas, plantilla.num_boxes))  # Segundo en que se libera cada box
+    ultimo_inicio = np.full(replicas, -1.0)
+    
+    ingresados = np.zeros(replicas, dtype=np.int64)
+    atendidos = np.zeros(replicas, dtype=np.int64)
+    abandonos = np.zeros(replicas, dtype=np.int64)
+    espera_total = np.zeros(replicas)
+    espera_max = np.zeros(replicas)
+    atencion_total = np.zeros(replicas)
+    
+    for n in range(max_clientes):
+        llegada = llegadas[:, n]
+        activo = llegada < duracion
+        if not activo.any():
+            break
         
-        # Mostrar resumen de datos utilizados para los videos
-        print(f"\n" + "=" * 60)
-        print("RESUMEN DE DATOS UTILIZADOS EN LOS VIDEOS")
-        print("=" * 60)
-        print(f"• Duración de simulación: 4 horas (08:00 - 12:00)")
-        print(f"• Puntos de datos capturados: {len(self.historial_animacion)} (cada 60 segundos)")
-        print(f"• Número de boxes simulados: {self.num_boxes}")
-        print(f"• Probabilidad de llegada: {self.prob_ingreso:.6f} por segundo")
-        print(f"• Tiempo máximo de espera: {self.tiempo_max_espera/60:.0f} minutos")
-        print(f"• Tiempo promedio de atención: {self.media_atencion/60:.0f} ± {self.desvio_atencion/60:.0f} minutos")
-        
-        if self.historial_animacion:
-            cola_max = max(estado['cola_size'] for estado in self.historial_animacion)
-            boxes_max_usado = max(estado['boxes_ocupados'] for estado in self.historial_animacion)
-            print(f"• Tamaño máximo de cola observado: {cola_max} clientes")
-            print(f"• Máximo de boxes simultáneamente ocupados: {boxes_max_usado}")
-        
-        print(f"• Videos generados para velocidades: {velocidades}")
-        print("=" * 60)
+        # Primer box que se libera (cualquier box libre es equivalente para el futuro)
+        box = box_libre.argmin(axis=1)
+        inicio = np.maximum(llegada, box_libre[filas, box])
+        if not asignacion_multiple:
+            inicio = np.maximum(inicio, ultimo_inicio + 1)
         
-        print(f"\n¡Generación de videos completada!")
-        return True
+        # Se atiende si se asigna antes de cumplir la espera máxima y antes del cierre
+        asignado = activo & (inicio <= llegada + plantilla.tiempo_max_espera) & (inicio < duracion)
+        fin = np.ceil(inicio + atenciones[:, n])
+        box_libre[filas, box] = np.where(asignado, fin, box_libre[filas, box])
+        ultimo_inicio = np.where(asignado, inicio, ultimo_inicio)
+        
+        completado = asignado & (fin < limite)
+        espera = np.where(asignado, inicio - llegada, 0)
+        ingresados += activo
+        atendidos += completado
+        abandonos += activo & ~asignado
+        espera_total += espera
+        espera_max = np.maximum(espera_max, espera)
+        atencion_total += np.where(completado, fin - inicio, 0)
+    
+    asignados = atendidos + (box_libre >= limite).sum(axis=1)  # Incluye atenciones que no terminaron
+    return {
+        'clientes_ingresados': ingresados,
+        'clientes_atendidos': atendidos,
+        'clientes_abandonaron': abandonos,
+        'tiempo_promedio_espera': np.where(asignados > 0, espera_total / np.maximum(asignados, 1), np.nan),
+        'tiempo_maximo_espera': espera_max,
+        'tiempo_promedio_atencion': np.where(atendidos > 0, atencion_total / np.maximum(atendidos, 1), np.nan),
+    }
+
+def estadistico_ks(muestra_a, muestra_b):
+    """Estadístico de Kolmogorov-Smirnov de dos muestras"""
+    a = np.sort(np.asarray(muestra_a, dtype=float))
+    b = np.sort(np.asarray(muestra_b, dtype=float))
+    puntos = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, puntos, side='right') / len(a)
+    cdf_b = np.searchsorted(b, puntos, side='right') / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+def comparar_distribuciones(muestras_a, muestras_b, alfa=0.01, nombres=('a', 'b')):
+    """Compara dos muestras de cada métrica con tests de Kolmogorov-Smirnov y z de medias.
+
+    muestras_a y muestras_b tienen un arreglo por métrica, con la misma cantidad
+    de valores en todas las métricas de un mismo lado (se usan las métricas de
+    muestras_a). Una métrica pasa si ninguno de los dos tests rechaza con nivel
+    alfa; devuelve el detalle, los valores críticos y si todas pasan.
+    """
+    n = len(next(iter(muestras_a.values())))
+    m = len(next(iter(muestras_b.values())))
+    # Valor crítico asintótico de KS y cuantil normal para el test de medias
+    critico_ks = math.sqrt(-math.log(alfa / 2) / 2) * math.sqrt((n + m) / (n * m))
+    critico_z = NormalDist().inv_cdf(1 - alfa / 2)
+    detalle = {}
+    for metrica, valores in muestras_a.items():
+        a = np.asarray(valores, dtype=float)
+        b = np.asarray(muestras_b[metrica], dtype=float)
+        error = math.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+        z = (a.mean() - b.mean()) / error if error > 0 else 0.0
+        ks = estadistico_ks(a, b)
+        detalle[metrica] = {
+            f'media_{nombres[0]}': float(a.mean()),
+            f'media_{nombres[1]}': float(b.mean()),
+            'z': z,
+            'ks': ks,
+            'pasa': abs(z) < critico_z and ks < critico_ks,
+        }
+    return {'equivalentes': all(d['pasa'] for d in detalle.values()), 'detalle': detalle,
+            'critico_ks': critico_ks, 'critico_z': critico_z}
+
+def verificar_kernel_vectorizado(num_boxes=4, replicas=2000, semilla=0, alfa=0.01, procesos=None):
+    """Compara las distribuciones del kernel vectorizado contra el motor escalar.
 
-def comparar_configuraciones():
-    """Compara diferentes configuraciones de boxes"""
+    Para cada métrica aplica un test de Kolmogorov-Smirnov de dos muestras y un
+    test z de diferencia de medias; devuelve el detalle y si todas pasan.
+    """
+    semilla_escalar, semilla_vectorizada = np.random.SeedSequence(semilla).spawn(2)
+    escalar = {m: [] for m in ('clientes_ingresados', 'clientes_atendidos', 'clientes_abandonaron', 'costo_total')}
+    semillas = semilla_escalar.spawn(replicas)
+    if procesos == 1:
+        reportes = simular_lote_replicas({'num_boxes': num_boxes}, semillas)[0]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            lotes = [semillas[i:i + 50] for i in range(0, replicas, 50)]
+            reportes = [r for lote in pool.map(simular_lote_replicas, [{'num_boxes': num_boxes}] * len(lotes), lotes)
+                        for r in lote[0]]
+    for reporte in reportes:
+        for metrica in escalar:
+            escalar[metrica].append(reporte[metrica])
+    
+    vectorizado = simular_replicas_vectorizado(num_boxes, replicas, semilla_vectorizada)
+    return comparar_distribuciones(escalar, vectorizado, alfa, nombres=('escalar', 'vectorizado'))
+
+def comparar_configuraciones(motor='eventos', semilla=None, cache=None):
+    """Compara diferentes configuraciones de boxes (con semilla y caché, reutiliza corridas anteriores)"""
     print("ANÁLISIS COMPARATIVO DE CONFIGURACIONES")
     print("=" * 60)
     
@@ -495,9 +2253,17 @@ def comparar_configuraciones():
     
     for num_boxes in configuraciones:
         print(f"\nProbando configuración con {num_boxes} boxes...")
-        simulador = SimuladorAtencionPublico(num_boxes)
-        simulador.simular(mostrar_progreso=False)
-        resultado = simulador.generar_reporte()
+        simulador = SimuladorAtencionPublico(num_boxes, motor=motor, semilla=semilla)
+        clave = cache.clave(simulador.parametros(), semilla, motor) if cache is not None else None
+        resultado = cache.obtener(clave) if clave is not None else None
+        if resultado is not None:
+            print("Resultado tomado de la caché.")
+            resultado = dict(resultado[0])
+        else:
+            simulador.simular(mostrar_progreso=False)
+            resultado = simulador.generar_reporte()
+            if clave is not None:
+                cache.guardar(clave, (resultado, simulador.estadisticas_espera, simulador.estadisticas_atencion))
         resultado['num_boxes'] = num_boxes
         resultados.append(resultado)
     
@@ -523,6 +2289,227 @@ def comparar_configuraciones():
     print(f"Tasa de atención: {mejor_config['tasa_atencion']:.2f}%")
     print("=" * 60)
 
+def obtener_replicas(observaciones, pedidos, entropia, pool=None, motor='eventos', tamano_lote=4,
+                     numeros_comunes=False, cache=None):
+    """Completa las réplicas de costo y abandonos de cada configuración hasta la cantidad pedida.
+
+    La réplica r de la configuración c usa siempre la semilla (entropia, c, r),
+    o (entropia, r) con números comunes, así que las réplicas ya calculadas se
+    reutilizan y el resultado no depende del orden de evaluación ni de la
+    cantidad de procesos.
+    """
+    tareas = []
+    for num_boxes, cantidad in pedidos.items():
+        obs = observaciones.setdefault(num_boxes, {'costo_total': [], 'clientes_abandonaron': []})
+        for inicio in range(len(obs['costo_total']), cantidad, tamano_lote):
+            semillas = [np.random.SeedSequence(entropia, spawn_key=(r,) if numeros_comunes else (num_boxes, r))
+                        for r in range(inicio, min(inicio + tamano_lote, cantidad))]
+            tareas.append((num_boxes, semillas))
+    
+    if pool is None:
+        lotes = [simular_lote_replicas({'num_boxes': c}, semillas, motor, cache=cache) for c, semillas in tareas]
+    else:
+        futuros = [pool.submit(simular_lote_replicas, {'num_boxes': c}, semillas, motor, cache=cache)
+                   for c, semillas in tareas]
+        lotes = [futuro.result() for futuro in futuros]
+    
+    # Las tareas de una misma configuración están en orden de réplica
+    for (num_boxes, _), (reportes, _, _) in zip(tareas, lotes):
+        for reporte in reportes:
+            for metrica in ('costo_total', 'clientes_abandonaron'):
+                observaciones[num_boxes][metrica].append(reporte[metrica])
+
+def acotar_configuraciones(observaciones, candidatos, costo_box, perdida_cliente, confianza):
+    """Descarta configuraciones cuya cota inferior de costo supera la cota superior de la mejor evaluada.
+
+    Usa que los abandonos esperados no aumentan al agregar boxes: para c boxes,
+    costo(c) >= c * costo_box + perdida * abandonos(g) para cualquier g >= c evaluado.
+    """
+    evaluados = sorted(observaciones)
+    mejor_cota_superior = min(sum(intervalo_confianza(observaciones[g]['costo_total'], confianza))
+                              for g in evaluados)
+    cota_abandonos = {}
+    for g in evaluados:
+        media, semiancho = intervalo_confianza(observaciones[g]['clientes_abandonaron'], confianza)
+        cota_abandonos[g] = max(0.0, media - semiancho)
+    
+    sobrevivientes = []
+    for c in candidatos:
+        mayores = [g for g in evaluados if g >= c]
+        abandonos_minimos = cota_abandonos[min(mayores)] if mayores else 0.0
+        if c * costo_box + perdida_cliente * abandonos_minimos <= mejor_cota_superior:
+            sobrevivientes.append(c)
+    return sobrevivientes
+
+def seleccionar_mejor_configuracion(minimo=1, maximo=10, confianza=0.95, indiferencia=1000,
+                                    replicas_iniciales=10, lote=5, max_replicas=2000, semilla=None,
+                                    procesos=None, motor='eventos', mostrar_progreso=True,
+                                    numeros_comunes=True, cache=None, usar_aproximacion=True):
+    """Busca la cantidad de boxes de menor costo esperado con ranking y selección secuencial.
+
+    Con usar_aproximacion=True el rango se recorta antes de simular a las
+    configuraciones que aproximar_erlang_a no descarta. Luego evalúa una grilla
+    geométrica del rango y descarta sin simular las configuraciones claramente
+    dominadas (ver acotar_configuraciones). Sobre las restantes aplica el
+    procedimiento de eliminación de Kim y Nelson (KN): agrega réplicas de a
+    lotes solo a las configuraciones que siguen en carrera, hasta que queda una.
+    Con probabilidad al menos `confianza`, la elegida está a menos de
+    `indiferencia` pesos del costo esperado óptimo. Con números comunes las
+    varianzas de las diferencias pareadas son menores y se elimina antes.
+    """
+    if replicas_iniciales < 2:
+        raise ValueError(f"replicas_iniciales tiene que ser al menos 2 para estimar varianzas "
+                         f"(se pidió {replicas_iniciales})")
+    plantilla = SimuladorAtencionPublico(1)
+    entropia = np.random.SeedSequence(semilla).entropy
+    if semilla is None:
+        cache = None  # Las semillas derivadas de entropía aleatoria no se vuelven a repetir
+    observaciones = {}
+    if usar_aproximacion:
+        parametros = {k: v for k, v in plantilla.parametros().items() if k not in ('asignacion_multiple', 'antitetico')}
+        rango = range(minimo, maximo + 1)
+        conservados, _ = descartar_dominadas([dict(parametros, num_boxes=c) for c in rango])
+        minimo, maximo = rango[conservados[0]], rango[conservados[-1]]
+        if mostrar_progreso:
+            print(f"Aproximación Erlang-A: se simulan de {minimo} a {maximo} boxes ({len(rango)} en el rango pedido)")
+    procesos = procesos or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    
+    try:
+        # Fase 1: grilla geométrica y cotas de dominancia sobre todo el rango
+        grilla = {minimo, maximo}
+        paso = 1
+        while minimo + paso - 1 < maximo:
+            grilla.add(minimo + paso - 1)
+            paso *= 2
+        obtener_replicas(observaciones, {c: replicas_iniciales for c in grilla}, entropia, pool, motor,
+                         numeros_comunes=numeros_comunes, cache=cache)
+        candidatos = acotar_configuraciones(observaciones, range(minimo, maximo + 1),
+                                            plantilla.costo_box, plantilla.perdida_cliente, confianza)
+        if mostrar_progreso:
+            print(f"Acotamiento: {len(candidatos)} de {maximo - minimo + 1} configuraciones siguen en carrera "
+                  f"({candidatos[0]}..{candidatos[-1]} boxes)")
+        
+        # Fase 2: primera etapa de KN con n0 réplicas por candidato
+        n0 = replicas_iniciales
+        obtener_replicas(observaciones, {c: n0 for c in candidatos}, entropia, pool, motor,
+                         numeros_comunes=numeros_comunes, cache=cache)
+        k = len(candidatos)
+        alfa = 1 - confianza
+        h2 = 0.0
+        if k > 1:
+            eta = 0.5 * ((2 * alfa / (k - 1)) ** (-2 / (n0 - 1)) - 1)
+            h2 = 2 * eta * (n0 - 1)
+        costos = lambda c: np.asarray(observaciones[c]['costo_total'], dtype=float)
+        varianzas = {(i, l): float(np.var(costos(i)[:n0] - costos(l)[:n0], ddof=1))
+                     for i in candidatos for l in candidatos if i != l}
+        
+        en_carrera = list(candidatos)
+        eliminados = {}
+        r = n0
+        while len(en_carrera) > 1 and r < max_replicas:
+            medias = {c: costos(c)[:r].mean() for c in en_carrera}
+            siguen = []
+            for i in en_carrera:
+                dominada = False
+                for l in en_carrera:
+                    if l == i:
+                        continue
+                    margen = max(0.0, indiferencia / (2 * r) * (h2 * varianzas[i, l] / indiferencia**2 - r))
+                    if medias[i] > medias[l] + margen:
+                        dominada = True
+                        break
+                if dominada:
+                    eliminados[i] = r
+                else:
+                    siguen.append(i)
+            if mostrar_progreso and len(siguen) < len(en_carrera):
+                print(f"Réplicas: {r} | En carrera: {siguen}")
+            en_carrera = siguen
+            if len(en_carrera) > 1:
+                r = min(r + lote, max_replicas)
+                obtener_replicas(observaciones, {c: r for c in en_carrera}, entropia, pool, motor,
+                                 numeros_comunes=numeros_comunes, cache=cache)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    
+    mejor = min(en_carrera, key=lambda c: costos(c)[:r].mean())
+    replicas_totales = sum(len(obs['costo_total']) for obs in observaciones.values())
+    resultado = {
+        'num_boxes': mejor,
+        'costo_total': float(costos(mejor).mean()),
+        'costo_total_ic': tuple(m + signo * h for m, h in [intervalo_confianza(costos(mejor), confianza)]
+                                for signo in (-1, 1)),
+        'replicas_totales': replicas_totales,
+        'candidatos': candidatos,
+        'eliminados': eliminados,
+        'sin_decidir': en_carrera if len(en_carrera) > 1 else [],
+    }
+    
+    if mostrar_progreso:
+        print("\n" + "=" * 60)
+        print(f"CONFIGURACIÓN ELEGIDA: {mejor} boxes")
+        print(f"Costo total medio: ${resultado['costo_total']:,.2f}")
+        print(f"Réplicas simuladas en total: {replicas_totales}")
+        if resultado['sin_decidir']:
+            print(f"Se alcanzó el máximo de réplicas sin separar: {resultado['sin_decidir']}")
+        print("=" * 60)
+    return resultado
+
+def comparar_configuraciones_replicadas(configuraciones=range(1, 11), replicas=30, semilla=None,
+                                        procesos=None, confianza=0.95, motor='eventos',
+                                        numeros_comunes=True, antiteticas=False, cache=None, podar=False):
+    """Compara configuraciones de boxes con varias replicaciones e intervalos de confianza.
+
+    Con podar=True no se simulan las configuraciones que aproximar_erlang_a
+    descarta por dominadas; se listan al final con su costo aproximado.
+    """
+    print("ANÁLISIS COMPARATIVO DE CONFIGURACIONES CON REPLICACIONES")
+    print("=" * 60)
+    podadas = []
+    if podar:
+        configuraciones = list(configuraciones)
+        conservados, aproximaciones = descartar_dominadas([{'num_boxes': c} for c in configuraciones])
+        podadas = [(c, aproximaciones[i]) for i, c in enumerate(configuraciones) if i not in conservados]
+        configuraciones = [configuraciones[i] for i in conservados]
+        print(f"Aproximación Erlang-A: {len(podadas)} configuraciones dominadas no se simulan")
+    print(f"{replicas} replicaciones por configuración, confianza {confianza:.0%}")
+    if numeros_comunes:
+        print("Números aleatorios comunes entre configuraciones" + (" con pares antitéticos" if antiteticas else ""))
+    
+    resultados = ejecutar_replicaciones(configuraciones, replicas=replicas, semilla=semilla,
+                                        procesos=procesos, confianza=confianza, motor=motor,
+                                        numeros_comunes=numeros_comunes, antiteticas=antiteticas, cache=cache)
+    mejor_config = min(resultados, key=lambda x: x['costo_total'])
+    
+    print("\n" + "=" * 96)
+    print("RESUMEN COMPARATIVO (media ± semiancho del intervalo)")
+    print("=" * 96)
+    print(f"{'Boxes':<6} {'Abandonos':<16} {'Tasa %':<16} {'Costo Total':<24} "
+          f"{'Dif. con la mejor' if numeros_comunes else '':<24}")
+    print("-" * 96)
+    
+    for resultado in resultados:
+        semiancho = lambda metrica: (resultado[f'{metrica}_ic'][1] - resultado[f'{metrica}_ic'][0]) / 2
+        abandonos = f"{resultado['clientes_abandonaron']:.1f} ± {semiancho('clientes_abandonaron'):.1f}"
+        tasa = f"{resultado['tasa_atencion']:.1f} ± {semiancho('tasa_atencion'):.1f}"
+        costo = f"${resultado['costo_total']:,.0f} ± {semiancho('costo_total'):,.0f}"
+        diferencia = ""
+        if numeros_comunes:
+            diferencia = f"${resultado['diferencia_con_mejor']:,.0f} ± {semiancho('diferencia_con_mejor'):,.0f}"
+        print(f"{resultado['num_boxes']:<6} {abandonos:<16} {tasa:<16} {costo:<24} {diferencia:<24}")
+    for num_boxes, aproximacion in podadas:
+        costo = f"~${aproximacion['costo_total']:,.0f} (aproximado)"
+        print(f"{num_boxes:<6} {aproximacion['abandonos']:<16.1f} {'':<16} {costo:<24}")
+    
+    print("\n" + "=" * 96)
+    print(f"CONFIGURACIÓN ÓPTIMA (menor costo medio): {mejor_config['num_boxes']} boxes")
+    print(f"Costo total medio: ${mejor_config['costo_total']:,.2f}")
+    print(f"Tasa de atención media: {mejor_config['tasa_atencion']:.2f}%")
+    print("=" * 96)
+    return resultados
+
 def main():
     """Función principal del programa"""
     print("SIMULADOR DE SISTEMA DE ATENCIÓN AL PÚBLICO")
@@ -560,7 +2547,19 @@ def main():
                 print("Por favor ingresa un número válido.")
         
         elif opcion == '2':
-            comparar_configuraciones()
+            try:
+                replicas = int(input("Replicaciones por configuración (1 = corrida única): ") or "1")
+            except ValueError:
+                replicas = 1
+            try:
+                semilla = int(input("Semilla (vacío = aleatoria; con semilla se reutilizan corridas en caché): "))
+                cache = CacheResultados()
+            except ValueError:
+                semilla = cache = None
+            if replicas > 1:
+                comparar_configuraciones_replicadas(replicas=replicas, semilla=semilla, cache=cache)
+            else:
+                comparar_configuraciones(semilla=semilla, cache=cache)
         
         elif opcion == '3':
             try:
@@ -0,0 +1,331 @@
+"""Benchmarks del simulador de atención al público.
+
+Mide segundos simulados por segundo real, clientes por segundo, memoria pico y
+bloques de memoria asignados para cada motor variando la cantidad de boxes, la
+tasa de llegadas (incluida sobrecarga fuerte), la duración de la jornada y la
+cantidad de replicaciones; también mide las rutas de renderizado y el costo de
+importar el núcleo sin la visualización. Los
+resultados se guardan en JSON para comparar motores y detectar regresiones
+contra una corrida anterior, y se incluye una verificación estadística de que
+los motores rápidos reproducen las distribuciones del motor por ticks y de
+que la caché de resultados respeta su tamaño máximo con un pool de procesos.
+
+Uso:
+    python benchmark.py                        # perfil rápido, guarda benchmark_resultados.json
+    python benchmark.py --perfil completo      # escalas grandes (1-500 boxes, jornadas de 24 h)
+    python benchmark.py --comparar anterior.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import matplotlib
+import matplotlib.animation as animation
+import numpy as np
+
+import MyS
+
+# Escalas de cada perfil: (boxes, probabilidades de llegada por segundo, horas de jornada, réplicas)
+PERFILES = {
+    'rapido': {
+        'boxes': (1, 5, 50),
+        'prob_ingreso': (1/144, 1/30),
+        'horas': (4,),
+        'replicas': (10, 100),
+        'replicas_vectorizado': (1000, 10000),
+        'replicas_equivalencia': 200,
+        'intervalo_animacion': 600,
+    },
+    'completo': {
+        'boxes': (1, 5, 50, 500),
+        'prob_ingreso': (1/144, 1/30, 1/5),  # 1/5: sobrecarga fuerte aun con 50 boxes
+        'horas': (4, 24),
+        'replicas': (10, 100, 1000),
+        'replicas_vectorizado': (1000, 10000, 100000),
+        'replicas_equivalencia': 1000,
+        'intervalo_animacion': 60,
+    },
+}
+
+METRICAS_EQUIVALENCIA = ('clientes_atendidos', 'clientes_abandonaron', 'costo_total')
+
+
+class EscritorNulo(animation.AbstractMovieWriter):
+    """Escritor de animaciones que dibuja cada cuadro fuera de pantalla y lo descarta"""
+    def setup(self, fig, outfile, dpi=None):
+        super().setup(fig, outfile, dpi)
+        self.cuadros = 0
+
+    def grab_frame(self, **savefig_kwargs):
+        self.fig.canvas.draw()
+        self.cuadros += 1
+
+    def finish(self):
+        pass
+
+
+def medir(funcion, memoria=True):
+    """Ejecuta funcion() y devuelve (resultado, segundos, memoria pico en bytes, bloques asignados).
+
+    El tiempo se mide sin tracemalloc (que frena la ejecución); con memoria=True
+    se repite la llamada bajo tracemalloc para obtener el pico y la cantidad de
+    bloques de memoria que la llamada asignó y siguen vivos en su resultado
+    (diferencia contra una instantánea tomada antes de llamarla).
+    """
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    pico = bloques = None
+    if memoria:
+        sin_tracemalloc = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        tracemalloc.start()
+        antes = tracemalloc.take_snapshot().filter_traces(sin_tracemalloc)
+        tracemalloc.reset_peak()
+        vivos = [funcion()]  # El resultado sigue vivo hasta después de la instantánea
+        _, pico = tracemalloc.get_traced_memory()
+        despues = tracemalloc.take_snapshot().filter_traces(sin_tracemalloc)
+        tracemalloc.stop()
+        bloques = sum(diferencia.count_diff for diferencia in despues.compare_to(antes, 'filename'))
+        vivos.clear()
+    return resultado, segundos, pico, bloques
+
+
+def benchmark_motores(perfil, semilla=0):
+    """Simula una jornada con cada motor en todas las combinaciones de escala"""
+    casos = []
+    for motor in MyS.MOTORES:
+        for num_boxes in perfil['boxes']:
+            for prob_ingreso in perfil['prob_ingreso']:
+                for horas in perfil['horas']:
+                    parametros = {'num_boxes': num_boxes, 'prob_ingreso': prob_ingreso,
+                                  'hora_cierre': (8 + horas) * 3600}
+
+                    def simular():
+                        simulador = MyS.SimuladorAtencionPublico(**parametros, motor=motor, semilla=semilla,
+                                                                 guardar_traza=False)
+                        simulador.simular(mostrar_progreso=False, imprimir=False)
+                        return simulador
+
+                    simulador, segundos, pico, bloques = medir(simular)
+                    _, segundos_reporte, _, _ = medir(lambda: simulador.generar_reporte(imprimir=False),
+                                                     memoria=False)
+                    casos.append({
+                        'grupo': 'simular',
+                        'motor': motor,
+                        **parametros,
+                        'segundos': segundos,
+                        'segundos_reporte': segundos_reporte,
+                        'segundos_simulados_por_segundo': simulador.duracion_simulacion / segundos,
+                        'clientes_por_segundo': simulador.clientes_ingresados / segundos,
+                        'memoria_pico': pico,
+                        'bloques_asignados': bloques,
+                    })
+                    print(f"simular {motor:<8} boxes={num_boxes:<4} prob=1/{1 / prob_ingreso:<5.0f} "
+                          f"horas={horas:<3} {casos[-1]['segundos_simulados_por_segundo']:>14,.0f} s sim/s")
+    return casos
+
+
+def benchmark_replicaciones(perfil, semilla=0):
+    """Mide replicaciones por segundo del pool de procesos y del kernel vectorizado"""
+    casos = []
+    for replicas in perfil['replicas']:
+        _, segundos, _, _ = medir(lambda: MyS.ejecutar_replicaciones([4], replicas=replicas, semilla=semilla,
+                                                                     mostrar_progreso=False), memoria=False)
+        casos.append({'grupo': 'replicaciones', 'motor': 'eventos', 'num_boxes': 4, 'replicas': replicas,
+                      'segundos': segundos, 'replicas_por_segundo': replicas / segundos})
+        print(f"replicaciones eventos    replicas={replicas:<7} {replicas / segundos:>10,.0f} réplicas/s")
+    for replicas in perfil['replicas_vectorizado']:
+        _, segundos, pico, bloques = medir(lambda: MyS.simular_replicas_vectorizado(4, replicas, semilla))
+        casos.append({'grupo': 'replicaciones', 'motor': 'vectorizado', 'num_boxes': 4, 'replicas': replicas,
+                      'segundos': segundos, 'replicas_por_segundo': replicas / segundos,
+                      'memoria_pico': pico, 'bloques_asignados': bloques})
+        print(f"replicaciones vectorizado replicas={replicas:<7} {replicas / segundos:>10,.0f} réplicas/s")
+    return casos
+
+
+def benchmark_renderizado(perfil, semilla=0):
+    """Mide crear_animacion (con un escritor fuera de pantalla) y crear_video_avi"""
+    simulador = MyS.SimuladorAtencionPublico(4, motor='eventos', semilla=semilla,
+                                             intervalo_muestreo=perfil['intervalo_animacion'])
+    simulador.simular(mostrar_progreso=False, imprimir=False)
+    cuadros = len(simulador.serie_temporal)
+    casos = []
+
+    def animar():
+        anim = simulador.crear_animacion()
+        anim.save('animacion', writer=EscritorNulo())
+        matplotlib.pyplot.close('all')
+
+    _, segundos, _, _ = medir(animar, memoria=False)
+    casos.append({'grupo': 'renderizado', 'ruta': 'crear_animacion', 'cuadros': cuadros,
+                  'segundos': segundos, 'cuadros_por_segundo': cuadros / segundos})
+
+    # Los videos se escriben en un directorio temporal que se borra al terminar
+    directorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as directorio:
+        os.chdir(directorio)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, segundos, _, _ = medir(lambda: simulador.crear_video_avi([1, 2], mostrar_menu=False),
+                                          memoria=False)
+        finally:
+            os.chdir(directorio_original)
+    casos.append({'grupo': 'renderizado', 'ruta': 'crear_video_avi', 'cuadros': cuadros, 'velocidades': 2,
+                  'segundos': segundos, 'cuadros_por_segundo': 2 * cuadros / segundos})
+    for caso in casos:
+        print(f"renderizado {caso['ruta']:<16} {caso['cuadros_por_segundo']:>8.1f} cuadros/s")
+    return casos
+
+
+def benchmark_importacion():
+    """Mide en un intérprete nuevo el tiempo y la memoria de importar el núcleo y la visualización"""
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    casos = []
+    for modulos in (('MyS',), ('MyS', 'visualizacion')):
+        # Pico de memoria residente en kB; VmHWM porque ru_maxrss hereda el pico del proceso padre
+        codigo = (f"import time; inicio = time.perf_counter(); import {', '.join(modulos)}; "
+                  "segundos = time.perf_counter() - inicio; import sys; "
+                  "pico = [l.split()[1] for l in open('/proc/self/status') if l.startswith('VmHWM')][0]; "
+                  "print(segundos, pico, 'matplotlib' in sys.modules)")
+        salida = subprocess.run([sys.executable, '-c', codigo], cwd=directorio, capture_output=True, text=True,
+                                check=True).stdout.split()
+        casos.append({'grupo': 'importacion', 'modulos': '+'.join(modulos), 'segundos': float(salida[0]),
+                      'memoria_residente': int(salida[1]) * 1024, 'carga_matplotlib': salida[2] == 'True'})
+        print(f"importar {casos[-1]['modulos']:<18} {casos[-1]['segundos']:>6.3f} s "
+              f"{casos[-1]['memoria_residente'] / 2**20:>6.1f} MB")
+    return casos
+
+
+def verificar_equivalencia(replicas, num_boxes=4, semilla=0, alfa=0.01):
+    """Compara los motores rápidos contra el motor de referencia por ticks.
+
+    El motor por eventos tiene que dar exactamente el mismo reporte que el de
+    ticks con la misma semilla. El kernel vectorizado usa otros números
+    aleatorios, así que se comparan las distribuciones de atendidos, abandonos y
+    costo con tests de Kolmogorov-Smirnov de dos muestras y z de medias.
+    """
+    semillas = np.random.SeedSequence(semilla).spawn(replicas)
+    referencia = {m: [] for m in METRICAS_EQUIVALENCIA}
+    distintas = 0
+    for s in semillas:
+        reportes = []
+        for motor in ('ticks', 'eventos'):
+            simulador = MyS.simular_replica({'num_boxes': num_boxes}, s, motor)
+            reportes.append(simulador.generar_reporte(imprimir=False))
+        distintas += reportes[0] != reportes[1]
+        for metrica in METRICAS_EQUIVALENCIA:
+            referencia[metrica].append(reportes[0][metrica])
+    resultados = [{'motor': 'eventos', 'replicas': replicas, 'reportes_distintos': int(distintas),
+                   'equivalentes': distintas == 0}]
+
+    vectorizado = MyS.simular_replicas_vectorizado(num_boxes, replicas, np.random.SeedSequence(semilla).spawn(2)[1])
+    comparacion = MyS.comparar_distribuciones(referencia, vectorizado, alfa, nombres=('ticks', 'vectorizado'))
+    resultados.append(dict(comparacion, motor='vectorizado', replicas=replicas, alfa=alfa))
+    for resultado in resultados:
+        print(f"equivalencia con ticks: {resultado['motor']:<12} "
+              f"{'OK' if resultado['equivalentes'] else 'DIFERENTE'}")
+    return resultados
+
+
+def verificar_cache(procesos=4, semilla=0):
+    """Comprueba que la caché respeta su tamaño máximo cuando la escriben los procesos del pool.
+
+    Cada proceso recibe su propia copia de la caché, así que el tamaño tiene que
+    medirse en el directorio; se acepta el exceso documentado de
+    fraccion_escaneo * tamano_maximo por proceso. Con el límite chico cada
+    escritura dispara un recorrido; con el grande un lote de réplicas queda por
+    debajo del umbral y hace falta acumular lo escrito entre tareas.
+    """
+    resultados = []
+    for configuraciones, replicas, tamano_maximo in (([2, 3, 4], 64, 20000), ([2, 3, 4, 5], 400, 1_000_000)):
+        with tempfile.TemporaryDirectory() as directorio:
+            cache = MyS.CacheResultados(directorio, tamano_maximo=tamano_maximo)
+            MyS.ejecutar_replicaciones(configuraciones, replicas=replicas, semilla=semilla, procesos=procesos,
+                                       mostrar_progreso=False, cache=cache)
+            tamano = cache.tamano()
+        limite = tamano_maximo * (1 + procesos * cache.fraccion_escaneo)
+        resultados.append({'replicas': replicas, 'configuraciones': len(configuraciones), 'procesos': procesos,
+                           'tamano_maximo': tamano_maximo, 'tamano_en_disco': tamano,
+                           'respeta_limite': tamano <= limite})
+        print(f"caché con {procesos} procesos: {tamano:,} bytes en disco (máximo {tamano_maximo:,}) "
+              f"{'OK' if resultados[-1]['respeta_limite'] else 'EXCEDIDA'}")
+    return resultados
+
+
+def clave_caso(caso):
+    """Identifica un caso para compararlo entre corridas (todo menos las mediciones)"""
+    medidas = ('segundos', 'segundos_reporte', 'segundos_simulados_por_segundo', 'clientes_por_segundo',
+               'memoria_pico', 'bloques_asignados', 'replicas_por_segundo', 'cuadros_por_segundo',
+               'memoria_residente')
+    return json.dumps({k: v for k, v in caso.items() if k not in medidas}, sort_keys=True)
+
+
+def comparar(actual, anterior, tolerancia=0.2):
+    """Lista los casos que tardan más de (1 + tolerancia) veces lo que tardaban en la corrida anterior"""
+    tiempos_anteriores = {clave_caso(caso): caso['segundos'] for caso in anterior['casos']}
+    regresiones = []
+    for caso in actual['casos']:
+        previo = tiempos_anteriores.get(clave_caso(caso))
+        if previo and caso['segundos'] > (1 + tolerancia) * previo:
+            regresiones.append({**caso, 'segundos_anterior': previo, 'relacion': caso['segundos'] / previo})
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador de atención al público")
+    parser.add_argument('--perfil', choices=sorted(PERFILES), default='rapido')
+    parser.add_argument('--salida', default='benchmark_resultados.json')
+    parser.add_argument('--comparar', help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    parser.add_argument('--sin-renderizado', action='store_true')
+    parser.add_argument('--semilla', type=int, default=0)
+    argumentos = parser.parse_args()
+    perfil = PERFILES[argumentos.perfil]
+
+    resultados = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'perfil': argumentos.perfil,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'plataforma': platform.platform(),
+        'procesadores': os.cpu_count(),
+        'version_motor': MyS.VERSION_MOTOR,
+        'casos': [],
+    }
+    resultados['casos'] += benchmark_importacion()
+    resultados['casos'] += benchmark_motores(perfil, argumentos.semilla)
+    resultados['casos'] += benchmark_replicaciones(perfil, argumentos.semilla)
+    if not argumentos.sin_renderizado:
+        resultados['casos'] += benchmark_renderizado(perfil, argumentos.semilla)
+    resultados['equivalencia'] = verificar_equivalencia(perfil['replicas_equivalencia'], semilla=argumentos.semilla)
+    resultados['cache'] = verificar_cache(semilla=argumentos.semilla)
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding='utf-8') as f:
+            resultados['regresiones'] = comparar(resultados, json.load(f), argumentos.tolerancia)
+        for regresion in resultados['regresiones']:
+            print(f"REGRESIÓN x{regresion['relacion']:.2f}: {clave_caso(regresion)}")
+
+    with open(argumentos.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, indent=2, default=float)
+    print(f"Resultados guardados en {argumentos.salida}")
+
+    fallas = [r['motor'] for r in resultados['equivalencia'] if not r['equivalentes']]
+    # El núcleo solo no tiene que cargar matplotlib
+    fallas += [c['modulos'] for c in resultados['casos'] if c.get('modulos') == 'MyS' and c['carga_matplotlib']]
+    if not all(r['respeta_limite'] for r in resultados['cache']):
+        fallas.append('cache')
+    return 1 if fallas or resultados.get('regresiones') else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+"""Visualización del simulador de atención al público: animación y videos.
+
+Está separada del núcleo de simulación (MyS) para que importar el simulador no
+cargue matplotlib ni Pillow: los procesos trabajadores y los trabajos por lotes
+que solo simulan arrancan más rápido y usan menos memoria. MyS importa este
+módulo recién cuando se pide una animación o un video.
+"""
+import matplotlib
+matplotlib.use('Agg')  # Usar backend sin interfaz gráfica
+import matplotlib.pyplot as plt
+import matplotlib.animation as animation
+from PIL import Image, ImageDraw, ImageFont
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+import shutil
+import subprocess
+import tempfile
+
+def crear_animacion(simulador, velocidad=1, guardar_archivo=False):
+    """Crea una animación del proceso simulado"""
+    if not len(simulador.serie_temporal):
+        print("No hay datos de animación disponibles.")
+        return
+    
+    renderizador = RenderizadorSimulacion(simulador, f'Simulación Sistema de Atención - {simulador.num_boxes} Boxes')
+    
+    # Crear animación
+    interval = max(50, 500 // velocidad)  # Ajustar velocidad
+    anim = renderizador.animacion(interval=interval, repeat=True)
+    
+    if guardar_archivo:
+        # Intentar guardar como AVI primero
+        try:
+            print("Guardando animación como 'simulacion_atencion.avi'...")
+            anim.save('simulacion_atencion.avi', writer='ffmpeg', fps=10, 
+                     extra_args=['-vcodec', 'libx264'])
+            print("Animación AVI guardada exitosamente!")
+        except Exception as e:
+            print(f"No se pudo guardar como AVI (requiere ffmpeg): {e}")
+            print("Guardando como GIF alternativo...")
+            anim.save('simulacion_atencion.gif', writer='pillow', fps=10)
+            print("Animación GIF guardada exitosamente!")
+    
+    plt.show()
+    return anim
+
+def crear_video_avi(simulador, velocidades=[1, 2, 5], mostrar_menu=True, procesos=None):
+    """Crea videos AVI con diferentes velocidades.
+
+    Los cuadros se dibujan una sola vez en un buffer RGB mapeado en disco y
+    cada velocidad se codifica en paralelo a partir de ese buffer; la
+    velocidad se agrega como un rótulo pegado sobre cada cuadro.
+    """
+    if not len(simulador.serie_temporal):
+        print("No hay datos de animación disponibles.")
+        return
+    
+    # Mostrar datos de la simulación antes de generar videos
+    print("\n" + "=" * 60)
+    print("DATOS DE LA SIMULACIÓN PARA GENERACIÓN DE VIDEO")
+    print("=" * 60)
+    simulador.generar_reporte()
+    
+    if mostrar_menu:
+        print("\n¿Qué velocidades de video deseas generar?")
+        print("1. Velocidad normal (1x)")
+        print("2. Velocidad rápida (2x)")
+        print("3. Velocidad muy rápida (5x)")
+        print("4. Todas las velocidades")
+        print("5. Velocidades personalizadas")
+        
+        opcion = input("Selecciona una opción (1-5): ").strip()
+        
+        if opcion == '1':
+            velocidades = [1]
+        elif opcion == '2':
+            velocidades = [2]
+        elif opcion == '3':
+            velocidades = [5]
+        elif opcion == '4':
+            velocidades = [1, 2, 5]
+        elif opcion == '5':
+            vel_input = input("Ingresa velocidades separadas por comas (ej: 1,3,10): ")
+            try:
+                velocidades = [int(v.strip()) for v in vel_input.split(',')]
+            except:
+                print("Error en formato, usando velocidades por defecto.")
+                velocidades = [1, 2, 5]
+    
+    # Rasterizar los cuadros una sola vez; cada velocidad solo vuelve a codificarlos
+    renderizador = RenderizadorSimulacion(
+        simulador, f'Simulación Sistema de Atención - {simulador.num_boxes} Boxes',
+        titulo_cuadro=lambda hora: f'Simulación Sistema de Atención - {simulador.num_boxes} Boxes - Hora: {hora:.2f}')
+    print(f"\nRasterizando {len(renderizador)} cuadros...")
+    ruta_cuadros, forma = renderizador.rasterizar()
+    plt.close(renderizador.fig)  # Cerrar figura para liberar memoria
+    
+    procesos = min(len(velocidades), procesos or os.cpu_count() or 1)
+    trabajos = [(ruta_cuadros, forma, velocidad, min(30, 10 * velocidad),  # FPS más alto para velocidades rápidas
+                 f'simulacion_atencion_velocidad_{velocidad}x') for velocidad in velocidades]
+    print(f"Codificando {len(velocidades)} video(s) con {procesos} proceso(s)...")
+    try:
+        if procesos == 1:
+            resultados = [codificar_video(*trabajo) for trabajo in trabajos]
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                resultados = list(pool.map(codificar_video, *zip(*trabajos)))
+    finally:
+        os.remove(ruta_cuadros)
+    
+    for velocidad, mensajes in zip(velocidades, resultados):
+        print(f"\nVelocidad {velocidad}x:")
+        for mensaje in mensajes:
+            print(mensaje)
+    
+    # Mostrar resumen de datos utilizados para los videos
+    print(f"\n" + "=" * 60)
+    print("RESUMEN DE DATOS UTILIZADOS EN LOS VIDEOS")
+    print("=" * 60)
+    print(f"• Duración de simulación: {simulador.duracion_simulacion / 3600:g} horas "
+          f"({simulador.hora_apertura // 3600:02d}:00 - {simulador.hora_cierre // 3600:02d}:{simulador.hora_cierre % 3600 // 60:02d})")
+    muestreo = f"cada {simulador.intervalo_muestreo} segundos" if simulador.intervalo_muestreo else "en cada cambio de estado"
+    print(f"• Puntos de datos capturados: {len(simulador.serie_temporal)} ({muestreo})")
+    print(f"• Número de boxes simulados: {simulador.num_boxes}")
+    print(f"• Probabilidad de llegada: {simulador.prob_ingreso:.6f} por segundo")
+    print(f"• Tiempo máximo de espera: {simulador.tiempo_max_espera/60:.0f} minutos")
+    print(f"• Tiempo promedio de atención: {simulador.media_atencion/60:.0f} ± {simulador.desvio_atencion/60:.0f} minutos")
+    
+    if len(simulador.serie_temporal):
+        serie = simulador.serie_temporal.columnas()
+        cola_max = serie['cola_size'].max()
+        boxes_max_usado = serie['boxes_ocupados'].max()
+        print(f"• Tamaño máximo de cola observado: {cola_max} clientes")
+        print(f"• Máximo de boxes simultáneamente ocupados: {boxes_max_usado}")
+    
+    print(f"• Videos generados para velocidades: {velocidades}")
+    print("=" * 60)
+    
+    print(f"\n¡Generación de videos completada!")
+    return True
+
+class RenderizadorSimulacion:
+    """Figura de la animación compartida por crear_animacion y crear_video_avi.
+
+    Los ejes, títulos, leyendas y líneas se crean una sola vez; cada cuadro solo
+    actualiza los datos de las líneas, así el costo por cuadro no crece con la
+    cantidad de cuadros y se puede usar blitting.
+    """
+    def __init__(self, simulador, titulo, titulo_cuadro=None, max_cuadros=600):
+        # Series largas (por ejemplo, muestreo en cada cambio) se reducen con LTTB: un cuadro por punto
+        serie = simulador.serie_temporal.reducir(max_cuadros)
+        self.tiempos = serie['tiempo'] / 3600 + 8  # Convertir a horas
+        self.cola_sizes = serie['cola_size']
+        self.boxes_ocupados = serie['boxes_ocupados']
+        self.atendidos = serie['atendidos']
+        self.abandonos = serie['abandonos']
+        self.titulo_cuadro = titulo_cuadro  # Función hora -> título, si el título cambia en cada cuadro
+        
+        self.fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 8))
+        self.titulo = self.fig.suptitle(titulo, fontsize=14)
+        
+        # Gráfico 1: Tamaño de cola en tiempo real
+        self.linea_cola, = ax1.plot([], [], 'b-', linewidth=2)
+        ax1.set_title('Tamaño de Cola')
+        ax1.set_ylabel('Clientes en cola')
+        ax1.set_ylim(0, self.cola_sizes.max() + 2)
+        
+        # Gráfico 2: Boxes ocupados
+        self.linea_boxes, = ax2.plot([], [], 'g-', linewidth=2)
+        ax2.set_title('Boxes Ocupados')
+        ax2.set_ylabel('Boxes en uso')
+        ax2.set_ylim(0, max(simulador.num_boxes, self.boxes_ocupados.max()) + 1)  # Una rama puede haber cerrado boxes
+        
+        # Gráfico 3: Clientes atendidos acumulado
+        self.linea_atendidos, = ax3.plot([], [], 'orange', linewidth=2)
+        ax3.set_title('Clientes Atendidos (Acumulado)')
+        ax3.set_ylabel('Total atendidos')
+        ax3.set_ylim(0, self.atendidos.max() + 5)
+        
+        # Gráfico 4: Comparación atendidos vs abandonos
+        self.linea_comparacion_atendidos, = ax4.plot([], [], 'g-', label='Atendidos', linewidth=2)
+        self.linea_comparacion_abandonos, = ax4.plot([], [], 'r-', label='Abandonos', linewidth=2)
+        ax4.set_title('Atendidos vs Abandonos')
+        ax4.set_ylabel('Cantidad')
+        ax4.legend()
+        ax4.set_ylim(0, max(self.atendidos.max(), self.abandonos.max()) + 5)
+        
+        for ax in (ax1, ax2, ax3, ax4):
+            ax.set_xlabel('Hora del día')
+            ax.grid(True)
+            ax.set_xlim(8, simulador.hora_cierre / 3600)
+        
+        self.fig.tight_layout()
+        self.lineas = [(self.linea_cola, self.cola_sizes),
+                       (self.linea_boxes, self.boxes_ocupados),
+                       (self.linea_atendidos, self.atendidos),
+                       (self.linea_comparacion_atendidos, self.atendidos),
+                       (self.linea_comparacion_abandonos, self.abandonos)]
+    
+    def __len__(self):
+        return len(self.tiempos)
+    
+    def iniciar(self):
+        """Deja las líneas vacías (cuadro base para el blitting)"""
+        for linea, _ in self.lineas:
+            linea.set_data([], [])
+        return [linea for linea, _ in self.lineas]
+    
+    def actualizar(self, frame):
+        """Muestra los datos hasta el cuadro indicado; devuelve los artistas modificados"""
+        for linea, valores in self.lineas:
+            linea.set_data(self.tiempos[:frame+1], valores[:frame+1])
+        artistas = [linea for linea, _ in self.lineas]
+        if self.titulo_cuadro is not None:
+            self.titulo.set_text(self.titulo_cuadro(self.tiempos[frame]))
+            artistas.append(self.titulo)
+        return artistas
+    
+    def rasterizar(self, ruta=None):
+        """Dibuja todos los cuadros en un buffer RGB mapeado en disco.
+
+        Dibuja la figura completa una sola vez sin datos y la guarda como fondo;
+        cada cuadro restaura ese fondo y redibuja solo las líneas y el título.
+        Devuelve (ruta, forma) del archivo con los cuadros (cuadros, alto, ancho, 3).
+        """
+        if ruta is None:
+            descriptor, ruta = tempfile.mkstemp(suffix='.npy')
+            os.close(descriptor)
+        canvas = self.fig.canvas
+        titulo_original = self.titulo.get_text()
+        self.iniciar()
+        if self.titulo_cuadro is not None:
+            self.titulo.set_text('')
+        canvas.draw()
+        fondo = canvas.copy_from_bbox(self.fig.bbox)
+        alto, ancho = np.asarray(canvas.buffer_rgba()).shape[:2]
+        forma = (len(self), alto, ancho, 3)
+        cuadros = np.lib.format.open_memmap(ruta, mode='w+', dtype=np.uint8, shape=forma)
+        for frame in range(len(self)):
+            canvas.restore_region(fondo)
+            for artista in self.actualizar(frame):
+                self.fig.draw_artist(artista)
+            cuadros[frame] = np.asarray(canvas.buffer_rgba())[:, :, :3]
+        cuadros.flush()
+        del cuadros
+        self.titulo.set_text(titulo_original)
+        return ruta, forma
+    
+    def animacion(self, interval, repeat):
+        """Crea la FuncAnimation; usa blitting si el título no cambia entre cuadros"""
+        return animation.FuncAnimation(self.fig, self.actualizar, init_func=self.iniciar, frames=len(self),
+                                       interval=interval, repeat=repeat, blit=self.titulo_cuadro is None)
+
+def rotulo_velocidad(velocidad, alto=28):
+    """Rótulo 'Velocidad Nx' como arreglo RGB para pegar sobre los cuadros"""
+    texto = f'Velocidad {velocidad}x'
+    try:
+        fuente = ImageFont.load_default(size=alto - 10)
+    except TypeError:  # Pillow sin fuentes escalables
+        fuente = ImageFont.load_default()
+    izquierda, arriba, derecha, abajo = ImageDraw.Draw(Image.new('RGB', (1, 1))).textbbox((0, 0), texto, font=fuente)
+    imagen = Image.new('RGB', (derecha - izquierda + 16, max(alto, abajo - arriba + 8)), (255, 255, 255))
+    dibujo = ImageDraw.Draw(imagen)
+    dibujo.rectangle([0, 0, imagen.width - 1, imagen.height - 1], outline=(0, 0, 0))
+    dibujo.text((8 - izquierda, (imagen.height - (abajo - arriba)) // 2 - arriba), texto, fill=(0, 0, 0), font=fuente)
+    return np.asarray(imagen)
+
+def cuadros_con_rotulo(cuadros, rotulo, margen=8):
+    """Recorre los cuadros del buffer con el rótulo pegado en la esquina superior izquierda"""
+    alto, ancho = rotulo.shape[:2]
+    for cuadro in cuadros:
+        cuadro = np.array(cuadro)
+        cuadro[margen:margen + alto, margen:margen + ancho] = rotulo
+        yield cuadro
+
+def codificar_video(ruta_cuadros, forma, velocidad, fps, nombre_base):
+    """Codifica los cuadros rasterizados a una velocidad; devuelve los mensajes para mostrar.
+
+    Envía los cuadros crudos por la entrada estándar de ffmpeg; si ffmpeg no
+    está disponible o falla, guarda un GIF con Pillow.
+    """
+    cuadros = np.load(ruta_cuadros, mmap_mode='r')
+    rotulo = rotulo_velocidad(velocidad)
+    mensajes = []
+    
+    archivo_avi = f'{nombre_base}.avi'
+    ffmpeg = shutil.which(matplotlib.rcParams['animation.ffmpeg_path'])
+    try:
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg no está instalado")
+        alto, ancho = forma[1:3]
+        proceso = subprocess.Popen(
+            [ffmpeg, '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{ancho}x{alto}',
+             '-r', str(fps), '-i', '-', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-vcodec', 'libx264',
+             '-preset', 'medium', '-pix_fmt', 'yuv420p', archivo_avi],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for cuadro in cuadros_con_rotulo(cuadros, rotulo):
+                proceso.stdin.write(cuadro.tobytes())
+        except BrokenPipeError:
+            pass
+        proceso.stdin.close()
+        error = proceso.stderr.read().decode(errors='replace').strip()
+        if proceso.wait() != 0:
+            raise RuntimeError(error or f"ffmpeg terminó con código {proceso.returncode}")
+        mensajes.append(f"✓ Video guardado: {archivo_avi}")
+    except Exception as e:
+        mensajes.append(f"✗ Error guardando {archivo_avi}: {e}")
+        # Fallback a GIF
+        archivo_gif = f'{nombre_base}.gif'
+        try:
+            # Paleta fija tomada del último cuadro (tiene todos los colores de la figura)
+            paleta = Image.fromarray(next(cuadros_con_rotulo(cuadros[-1:], rotulo))).quantize()
+            imagenes = (Image.fromarray(cuadro).quantize(palette=paleta, dither=Image.Dither.NONE)
+                        for cuadro in cuadros_con_rotulo(cuadros, rotulo))
+            primera = next(imagenes)
+            primera.save(archivo_gif, save_all=True, append_images=imagenes,
+                         duration=1000 / min(10, fps), loop=0)
+            mensajes.append(f"✓ GIF alternativo guardado: {archivo_gif}")
+        except Exception as e2:
+            mensajes.append(f"✗ Error guardando GIF: {e2}")
+    return mensajes